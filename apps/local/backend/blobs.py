@@ -0,0 +1,158 @@
+import json
+import os
+import shutil
+import time
+
+DAY = 86400
+
+
+class BlobStore:
+    """
+    Content-addressed PDF history: every published version is stored once under
+    objects/<sha[:2]>/<sha>.pdf, shared by all users and versions with that content.
+    versions.json lists each user's versions (oldest first); the published
+    public/pdfs/<user>.pdf is a hardlink (or symlink, or copy) to the latest one.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "versions.json")
+        self.versions = {}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                self.versions = json.load(f)
+        return self.versions
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.versions, f, indent=4, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+
+    def blob_path(self, sha):
+        return os.path.join(self.objects_dir, sha[:2], f"{sha}.pdf")
+
+    def put(self, path, sha):
+        """Moves `path` into the store as blob `sha` (dropping it if that content is already stored)."""
+        blob = self.blob_path(sha)
+        if os.path.exists(blob):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(path, blob)
+        return blob
+
+    def add_version(self, username, sha, size, source_url=None):
+        history = self.versions.setdefault(username, [])
+        if history and history[-1]["sha256"] == sha:
+            return False
+        history.append({"sha256": sha, "size": size, "added_at": int(time.time()), "url": source_url})
+        return True
+
+    def latest(self, username):
+        history = self.versions.get(username)
+        return history[-1] if history else None
+
+    def find(self, username, sha_prefix):
+        """The newest version of `username` whose hash starts with `sha_prefix`, or None."""
+        for version in reversed(self.versions.get(username, [])):
+            if version["sha256"].startswith(sha_prefix):
+                return version
+        return None
+
+    def link(self, sha, target_path):
+        """Atomically points target_path at blob `sha`: hardlink, else relative symlink, else copy."""
+        blob = self.blob_path(sha)
+        temp_path = target_path + ".link"
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(blob, temp_path)
+        except OSError:
+            try:
+                os.symlink(os.path.relpath(blob, os.path.dirname(target_path)), temp_path)
+            except OSError:
+                shutil.copyfile(blob, temp_path)
+        os.replace(temp_path, target_path)
+
+    def publish(self, username, staged_path, target_path, sha, source_url=None):
+        """Stores a new version of `username` and makes it the published PDF."""
+        size = os.path.getsize(staged_path)
+        self.put(staged_path, sha)
+        self.add_version(username, sha, size, source_url)
+        self.link(sha, target_path)
+
+    def rollback(self, username, sha, target_path):
+        """Republishes an older version; it becomes the newest entry of the history."""
+        version = self.find(username, sha)
+        if version is None or not os.path.exists(self.blob_path(version["sha256"])):
+            return None
+        history = self.versions[username]
+        history.remove(version)
+        history.append(dict(version, added_at=int(time.time())))
+        self.link(version["sha256"], target_path)
+        return version
+
+    def restore(self, pdf_dir):
+        """Recreates missing published PDFs from the store (e.g. after a fresh checkout). Returns the count."""
+        restored = 0
+        for username in self.versions:
+            latest = self.latest(username)
+            target_path = os.path.join(pdf_dir, f"{username}.pdf")
+            if latest and not os.path.exists(target_path) and os.path.exists(self.blob_path(latest["sha256"])):
+                self.link(latest["sha256"], target_path)
+                restored += 1
+        return restored
+
+    def remove_user(self, username):
+        return self.versions.pop(username, None) is not None
+
+    def prune(self, keep=None, keep_days=None, now=None):
+        """
+        Applies the retention policy: a version is kept if it is among the `keep`
+        newest or younger than `keep_days`; the latest version is always kept.
+        With neither limit set nothing is pruned. Returns the number of versions dropped.
+        """
+        if keep is None and keep_days is None:
+            return 0
+        now = now or time.time()
+        dropped = 0
+        for username, history in self.versions.items():
+            kept = []
+            for age_rank, version in enumerate(reversed(history)):
+                recent = keep_days is not None and now - version["added_at"] < keep_days * DAY
+                if age_rank == 0 or (keep is not None and age_rank < keep) or recent:
+                    kept.append(version)
+            dropped += len(history) - len(kept)
+            self.versions[username] = list(reversed(kept))
+        return dropped
+
+    def gc(self, grace=3600, now=None):
+        """
+        Deletes blobs no version references. Blobs modified within `grace` seconds are
+        left alone, so a concurrent sync that stored one but has not saved the index yet
+        is safe. Returns (blobs removed, bytes freed).
+        """
+        now = now or time.time()
+        referenced = {v["sha256"] for history in self.versions.values() for v in history}
+        removed, freed = 0, 0
+        if not os.path.isdir(self.objects_dir):
+            return removed, freed
+        for prefix in os.listdir(self.objects_dir):
+            directory = os.path.join(self.objects_dir, prefix)
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                if name[:-len(".pdf")] in referenced or now - stat.st_mtime < grace:
+                    continue
+                os.remove(path)
+                removed += 1
+                freed += stat.st_size
+            if not os.listdir(directory):
+                os.rmdir(directory)
+        return removed, freed
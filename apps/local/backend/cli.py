@@ -1,23 +1,329 @@
 import argparse
 import asyncio
+import json
+import multiprocessing
 import sys
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import uvicorn
 from backend.config import Config
+from backend.manifest import SyncManifest
+from backend.previews import PreviewUnavailable
+from backend.scheduler import SyncSchedule
+from backend.sharding import parse_shard, select_shard, split
 from overleaf_bot.core import OverleafBot
+from overleaf_bot.concurrency import AdaptiveLimiter
+from overleaf_bot.memory import MemoryWatchdog
+from overleaf_bot.tracing import TracePolicy
+from overleaf_bot.journal import SyncJournal
+from overleaf_bot.project_cache import ProjectCache
+from overleaf_bot.retry import TRANSIENT, DownloadFailure
+from overleaf_bot.pacing import Pacer
+from overleaf_bot.postprocess import default_pipeline
+from overleaf_bot.metrics import REGISTRY
 from backend.logger import setup_logger
 
 logger = setup_logger()
 
+def staged_path_for(username):
+    """Downloads land in a staging file next to the published PDF."""
+    return os.path.join(Config.PDF_DIR, f"{username}.pdf.new")
+
+def target_path_for(username):
+    return os.path.join(Config.PDF_DIR, f"{username}.pdf")
+
+def unpublished(user):
+    """True if the user has no published PDF (the schedule then treats the project as due)."""
+    return not os.path.exists(target_path_for(user["username"]))
+
+def build_pipeline(enabled=True):
+    """
+    PDF optimization pipeline for a sync cycle. Raw downloads identical to the
+    source of the published PDF skip the (CPU-heavy) stages.
+    """
+    if not enabled:
+        return None
+    manifest = SyncManifest(Config.MANIFEST_FILE)
+
+    def is_unchanged(staged_path, sha):
+        username = os.path.basename(staged_path)[:-len(".pdf.new")]
+        return manifest.source_unchanged(username, sha, target_path_for(username))
+
+    return default_pipeline(is_unchanged)
+
+async def download_users(bot, users, limiter=None, retries=0, retry_delay=5.0, journal=None, project_timeout=None):
+    """
+    Downloads the projects of `users` to their staging files.
+    :param limiter: Optional AdaptiveLimiter (defaults to 3 parallel downloads)
+    :param retries: Extra attempts for transient failures
+    :param retry_delay: Base backoff between attempts, in seconds
+    :param journal: Optional SyncJournal recording each project's outcome
+    :param project_timeout: Optional time budget per project (seconds, retries included)
+    Returns one (ok, post-processing report or None) tuple per user.
+    """
+    projects = [(user.get("url"), staged_path_for(user.get("username"))) for user in users]
+    results = await bot.batch_download_projects(
+        projects, limiter=limiter, retries=retries, retry_delay=retry_delay, journal=journal,
+        project_timeout=project_timeout
+    )
+    if bot.postprocess:
+        bot.postprocess.reports.clear()
+    return [(result, result.report if result else None) for result in results]
+
+def publish_downloads(users, downloads):
+    """
+    Publishes the staged PDFs whose content actually changed.
+    Returns a dict mapping username -> "changed" | "unchanged" | "failed".
+    """
+    manifest = SyncManifest(Config.MANIFEST_FILE, store=Config.blob_store())
+    outcomes = {}
+    for user, (ok, report) in zip(users, downloads):
+        username = user.get("username")
+        if not ok:
+            outcomes[username] = "failed"
+            continue
+        changed = manifest.apply(
+            username, staged_path_for(username), target_path_for(username), user.get("url"), report,
+            sha=getattr(ok, "sha256", None)
+        )
+        outcomes[username] = "changed" if changed else "unchanged"
+    if manifest.store is not None:
+        manifest.store.prune(Config.KEEP_VERSIONS, Config.KEEP_DAYS)
+    manifest.save()
+    return outcomes
+
+def render_previews(usernames):
+    """Renders the preview images of the published PDFs of `usernames` into the preview cache. Returns the count."""
+    cache = Config.preview_cache()
+    if not cache.available():
+        logger.warning("Previews need pypdfium2 and Pillow; skipping.")
+        return 0
+    manifest = SyncManifest(Config.MANIFEST_FILE)
+    rendered = 0
+    for username in usernames:
+        entry = manifest.get(username)
+        path = target_path_for(username)
+        if not entry or not os.path.exists(path):
+            continue
+        try:
+            rendered += cache.render(path, entry["sha256"])
+        except PreviewUnavailable as e:
+            logger.warning("No preview for %s: %s", username, e)
+    return rendered
+
+def summarize(outcomes):
+    counts = {"changed": 0, "unchanged": 0, "failed": 0}
+    for outcome in outcomes.values():
+        counts[outcome] += 1
+    return counts
+
+async def _download_in_worker(users, options, limiter):
+    pipeline = build_pipeline(options["optimize"])
+    async with OverleafBot(**options["bot"], pacer=Pacer(**options["pacer"]), postprocess=pipeline) as bot:
+        if not await bot.login(email=Config.EMAIL, password=Config.PASSWORD, manual=False):
+            logger.error("Worker authentication failed.")
+            return [(DownloadFailure(TRANSIENT, "worker login failed"), None)] * len(users)
+        journal = SyncJournal(Config.JOURNAL_FILE, options["run_id"]) if options["run_id"] else None
+        return await download_users(
+            bot, users, limiter, options["retries"], options["retry_delay"], journal, options["project_timeout"]
+        )
+
+def download_worker(users, options):
+    """
+    Entry point of a sync worker process: one browser per process.
+    Returns the downloads, the worker's metrics snapshot and its concurrency report.
+    """
+    limiter = AdaptiveLimiter(**options["concurrency"])
+    try:
+        downloads = asyncio.run(_download_in_worker(users, options, limiter))
+    except Exception as e:
+        logger.error("Sync worker failed: %s", e)
+        downloads = [(DownloadFailure(TRANSIENT, str(e)), None)] * len(users)
+    return downloads, REGISTRY.snapshot(), limiter.report()
+
+async def download_with_workers(users, workers, options):
+    """
+    Spreads the downloads over `workers` processes.
+    Returns the results in input order and the per-worker concurrency reports.
+    """
+    chunks = split(users, workers)
+    loop = asyncio.get_running_loop()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(chunks), mp_context=context) as executor:
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(executor, download_worker, chunk, options) for chunk in chunks
+        ))
+    by_username = {}
+    reports = []
+    for chunk, (part, metrics, report) in zip(chunks, parts):
+        REGISTRY.merge(metrics)
+        reports.append(report)
+        for user, download in zip(chunk, part):
+            by_username[user["username"]] = download
+    return [by_username[u["username"]] for u in users], reports
+
+def concurrency_summary(reports):
+    """Total settled parallelism over all processes, plus each process's limiter report."""
+    return {"settled": round(sum(r["settled"] for r in reports), 2), "processes": reports}
+
+def split_resumed(batch, completed):
+    """
+    Splits a resumed batch using the project IDs the interrupted run completed.
+    Returns (users whose staged download is still waiting to be published,
+    users left to download, number already published by the interrupted run).
+    """
+    finished, remaining, skipped = [], [], 0
+    for user in batch:
+        if user.get("url") not in completed:
+            remaining.append(user)
+        elif os.path.exists(staged_path_for(user.get("username"))):
+            finished.append(user)
+        else:
+            skipped += 1
+    return finished, remaining, skipped
+
 def run_sync(args):
     """Runs the synchronization bot."""
     Config.ensure_public_dir()
+    store = Config.blob_store()
+    if store is not None:
+        restored = store.restore(Config.PDF_DIR)
+        if restored:
+            logger.info("Restored %s published PDF(s) from the version store.", restored)
     
     # In setup mode, we force headful
     headless = not (args.setup or args.visible)
+    fetch_mode = "browser" if args.setup else args.fetch
+    workers = 1 if args.setup else max(1, args.workers)
+    shard = parse_shard(args.shard) if args.shard else None
+    # The rate limit is per process, so split it between the workers.
+    pacer_options = {"rate": args.rate / workers, "burst": args.burst, "jitter": args.jitter}
+    worker_options = {
+        "bot": {"headless": headless, "auth_path": Config.AUTH_FILE, "fetch_mode": fetch_mode,
+                "downloads_path": Config.DOWNLOADS_DIR, "max_pdf_size": Config.MAX_PDF_SIZE,
+                "project_cache": ProjectCache(Config.PROJECT_CACHE_FILE),
+                "watchdog": MemoryWatchdog(max_jobs=args.recycle_after or None,
+                                           max_rss=args.max_browser_rss * 1024 * 1024 or None),
+                "tracer": Config.tracer(args.trace)},
+        "pacer": pacer_options,
+        "concurrency": {"initial": args.concurrency, "floor": args.min_concurrency, "ceiling": args.max_concurrency},
+        "optimize": args.optimize and not args.setup,
+        "retries": args.retries,
+        "retry_delay": args.retry_delay,
+        "project_timeout": args.project_timeout or None,
+        "run_id": None
+    }
+    journal = SyncJournal(Config.JOURNAL_FILE)
+    resume = args.resume
+    # Single-process runs keep one limiter across --loop cycles, so later cycles start where the last one settled.
+    limiter = AdaptiveLimiter(**worker_options["concurrency"])
+    schedule = None
+    if args.schedule:
+        schedule = SyncSchedule(Config.SCHEDULE_FILE, min_interval=args.min_interval, max_interval=args.max_interval)
+
+    def select_users():
+        users = Config.load_users()
+        if shard:
+            users = select_shard(users, *shard)
+        if schedule is None:
+            return users, users
+        schedule.prune([u["username"] for u in users])
+        return users, schedule.due(users, limit=args.max_projects, missing=unpublished)
+
+    async def _cycle(bot):
+        nonlocal resume
+        users, batch = select_users()
+        if not users:
+            logger.warning("No users found in users.json")
+            return True
+        if not batch:
+            logger.info("No projects due (%s users).", len(users))
+            return True
+
+        # Only the first cycle may pick up an interrupted run.
+        resumed = journal.begin(resume=resume, max_age=args.resume_window)
+        resume = False
+        worker_options["run_id"] = journal.run_id
+        finished, batch, skipped = split_resumed(batch, journal.completed() if resumed else set())
+        if resumed:
+            logger.info("Resuming run %s: %s staged download(s) kept, %s already published.", journal.run_id, len(finished), skipped)
+
+        logger.info("Found %s users, syncing %s with %s worker(s).", len(users), len(batch), workers)
+        started = time.time()
+        if not batch:
+            downloads, reports = [], []
+        elif bot is None:
+            downloads, reports = await download_with_workers(batch, workers, worker_options)
+        else:
+            bot.postprocess = build_pipeline(worker_options["optimize"])
+            downloads = await download_users(
+                bot, batch, limiter, args.retries, args.retry_delay, journal, worker_options["project_timeout"]
+            )
+            reports = [limiter.report()]
+        failures = {u["username"]: ok.kind for u, (ok, _) in zip(batch, downloads) if not ok}
+        batch = finished + batch
+        outcomes = publish_downloads(batch, [(True, None)] * len(finished) + downloads)
+        journal.finish()
+        if args.previews:
+            render_previews([u for u, outcome in outcomes.items() if outcome == "changed"])
+
+        if schedule is not None:
+            for username, outcome in outcomes.items():
+                if outcome == "failed":
+                    schedule.record_failure(username)
+                else:
+                    schedule.record(username, outcome == "changed")
+            schedule.save()
+
+        counts = summarize(outcomes)
+        summary = {
+            "users": len(users),
+            "synced": len(batch),
+            **counts,
+            "workers": workers,
+            "resumed": len(finished) + skipped if resumed else None,
+            "concurrency": concurrency_summary(reports),
+            "shard": args.shard,
+            "duration": round(time.time() - started, 3),
+            "outcomes": outcomes,
+            "failures": failures
+        }
+        logger.info("Batch complete. %s changed, %s unchanged, %s failed (%s synced in %ss, concurrency settled at %s).",
+                    counts["changed"], counts["unchanged"], counts["failed"], len(batch), summary["duration"],
+                    summary["concurrency"]["settled"])
+        if args.summary:
+            with open(args.summary, "w") as f:
+                json.dump(summary, f, indent=4)
+        if args.metrics:
+            with open(args.metrics, "w") as f:
+                json.dump(REGISTRY.snapshot(), f, indent=4)
+        return not batch or counts["failed"] < len(batch)
+
+    async def _run_cycles(bot):
+        if not args.loop:
+            if not await _cycle(bot):
+                sys.exit(1)
+            return
+
+        while True:
+            await _cycle(bot)
+            earliest = schedule.earliest_due(select_users()[0], missing=unpublished) if schedule else None
+            delay = max(60, (earliest or 0) - time.time()) if schedule else args.min_interval
+            logger.info("Next cycle in %ss.", int(delay))
+            await asyncio.sleep(delay)
     
     async def _sync():
-        async with OverleafBot(headless=headless, auth_path=Config.AUTH_FILE) as bot:
+        if schedule is not None and not args.loop and not args.setup and not select_users()[1]:
+            logger.info("No projects due; nothing to do.")
+            return
+
+        if workers > 1:
+            # Every worker process starts its own browser and session.
+            await _run_cycles(None)
+            return
+
+        async with OverleafBot(**worker_options["bot"], pacer=Pacer(**pacer_options)) as bot:
             # 1. Login Phase
             if args.setup:
                 await bot.login(manual=True)
@@ -28,35 +334,81 @@ def run_sync(args):
                 sys.exit(1)
 
             # 2. Batch Processing
-            users = Config.load_users()
-            if not users:
-                logger.warning("No users found in users.json")
-                return
-
-            logger.info(f"Found {len(users)} users.")
-            
-            # Prepare batch arguments
-            projects = []
-            for user in users:
-                username = user.get("username")
-                target_path = os.path.join(Config.PDF_DIR, f"{username}.pdf")
-                projects.append((user.get("url"), target_path))
-
-            # Execute batch download
-            results = await bot.batch_download_projects(projects, max_concurrent=3)
-            
-            success_count = sum(1 for r in results if r)
-            logger.info(f"Batch complete. {success_count}/{len(users)} successful.")
-            
-            if success_count == 0 and len(users) > 0:
-                sys.exit(1)
+            await _run_cycles(bot)
 
     asyncio.run(_sync())
 
+def trace_policy(value):
+    """argparse type for --trace: validates the policy, keeps the string."""
+    try:
+        TracePolicy.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
 def run_server(args):
     """Runs the FastAPI server."""
+    if args.trace:
+        # The app reads it at import (also in the reloader's subprocess).
+        os.environ["OVERLINK_TRACE"] = Config.TRACE = args.trace
     uvicorn.run("backend.server:app", host=args.host, port=args.port, reload=args.reload)
 
+def run_bench(args):
+    """Runs the offline benchmark against a local fake Overleaf."""
+    from benchmark.run import run_benchmark
+    run_benchmark(args)
+
+def run_gc(args):
+    """Applies the retention policy and deletes unreferenced blobs from the version store."""
+    store = Config.blob_store()
+    if store is None:
+        print("Version store disabled (OVERLINK_VERSIONS=0).")
+        return
+    registered = {u["username"] for u in Config.load_users()}
+    dropped_users = [u for u in list(store.versions) if u not in registered]
+    for username in dropped_users:
+        store.remove_user(username)
+    dropped = store.prune(args.keep, args.keep_days)
+    store.save()
+    removed, freed = store.gc(grace=args.grace)
+    print(f"Dropped {dropped} version(s) and {len(dropped_users)} deleted user(s); "
+          f"removed {removed} blob(s), freed {freed / (1024 * 1024):.1f} MB.")
+
+def run_history(args):
+    """Lists the stored versions of a user's PDF, newest first."""
+    store = Config.blob_store()
+    history = store.versions.get(args.nickname, []) if store else []
+    if not history:
+        print(f"No stored versions for '{args.nickname}'.")
+        return
+    for version in reversed(history):
+        added = time.strftime("%Y-%m-%d %H:%M", time.localtime(version["added_at"]))
+        print(f"{version['sha256'][:12]}  {added}  {version['size']:>10} bytes  {store.blob_path(version['sha256'])}")
+
+def run_rollback(args):
+    """Republishes an older stored version of a user's PDF."""
+    manifest = SyncManifest(Config.MANIFEST_FILE, store=Config.blob_store())
+    version = manifest.rollback(args.nickname, args.sha, target_path_for(args.nickname))
+    if version is None:
+        print(f"No stored version {args.sha} for '{args.nickname}'.")
+        sys.exit(1)
+    manifest.save()
+    print(f"'{args.nickname}' now serves version {version['sha256'][:12]}.")
+
+def run_previews(args):
+    """Renders the preview images of all (or the given) users' published PDFs."""
+    usernames = args.nicknames or [u["username"] for u in Config.load_users()]
+    rendered = render_previews(usernames)
+    print(f"Rendered {rendered} preview image(s) for {len(usernames)} user(s).")
+
+def run_publish(args):
+    """Uploads the changed files of public/ to a directory or S3-compatible bucket."""
+    from backend.publish import parse_target, publish
+    target = parse_target(args.target, endpoint_url=args.endpoint_url)
+    summary = publish(Config.PUBLIC_DIR, target, jobs=args.jobs, delete=args.delete,
+                      dry_run=args.dry_run, manifest_file=Config.MANIFEST_FILE)
+    print(json.dumps(summary, indent=4))
+
 def run_user_add(args):
     """Adds or updates a user."""
     updated = Config.add_user(args.nickname, args.email, args.project_id)
@@ -78,16 +430,104 @@ def main():
     sync_parser = subparsers.add_parser("sync", help="Run the synchronization bot")
     sync_parser.add_argument("--setup", action="store_true", help="Run in Setup Mode (Manual Login)")
     sync_parser.add_argument("--visible", action="store_true", help="Run browser visibly")
+    sync_parser.add_argument("--fetch", choices=["auto", "http", "browser"], default=Config.FETCH_MODE,
+                             help="PDF retrieval mode: direct HTTP, browser UI, or HTTP with browser fallback")
+    sync_parser.add_argument("--rate", type=float, default=Config.RATE, help="Max requests per second to Overleaf (0 = unlimited)")
+    sync_parser.add_argument("--burst", type=int, default=Config.BURST, help="Max burst of requests above the rate")
+    sync_parser.add_argument("--jitter", type=float, default=Config.JITTER, help="Max random extra delay per request, in seconds")
+    sync_parser.add_argument("--schedule", action="store_true",
+                             help="Only sync projects that are due, polling frequently changing projects more often")
+    sync_parser.add_argument("--loop", action="store_true", help="Keep running sync cycles (use with --schedule)")
+    sync_parser.add_argument("--max-projects", type=int, default=None, help="Max projects per scheduled cycle")
+    sync_parser.add_argument("--min-interval", type=int, default=3600, help="Shortest polling interval in seconds")
+    sync_parser.add_argument("--max-interval", type=int, default=7 * 86400, help="Longest polling interval in seconds")
+    sync_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes, each with its own browser")
+    sync_parser.add_argument("--concurrency", type=int, default=3, help="Initial parallel downloads per worker")
+    sync_parser.add_argument("--min-concurrency", type=int, default=Config.MIN_CONCURRENCY,
+                             help="Floor of the adaptive download concurrency per worker")
+    sync_parser.add_argument("--max-concurrency", type=int, default=Config.MAX_CONCURRENCY,
+                             help="Ceiling of the adaptive download concurrency per worker (set equal to the floor for a fixed limit)")
+    sync_parser.add_argument("--resume", action="store_true",
+                             help="Continue an interrupted run, skipping the projects it already downloaded")
+    sync_parser.add_argument("--resume-window", type=int, default=86400,
+                             help="Only resume runs started less than this many seconds ago")
+    sync_parser.add_argument("--retries", type=int, default=2, help="Retries for transient failures (timeouts, navigation errors)")
+    sync_parser.add_argument("--retry-delay", type=float, default=5.0, help="Base of the jittered exponential retry backoff, in seconds")
+    sync_parser.add_argument("--project-timeout", type=float, default=300,
+                             help="Time budget per project in seconds, retries included (0 = none)")
+    sync_parser.add_argument("--recycle-after", type=int, default=Config.RECYCLE_JOBS,
+                             help="Replace the browser context after this many projects (0 = never)")
+    sync_parser.add_argument("--max-browser-rss", type=int, default=Config.MAX_BROWSER_RSS,
+                             help="Replace the browser context while Chromium uses more than this many MB (0 = no limit)")
+    sync_parser.add_argument("--trace", default=Config.TRACE, type=trace_policy, metavar="POLICY",
+                             help="Keep per-project traces (timeline, network timing, Playwright trace) of "
+                                  "'slow>20s' (slow or failed), 'failed' or 'all' projects, under OVERLINK_TRACE_DIR")
+    sync_parser.add_argument("--previews", action="store_true",
+                             help="Render preview images of changed PDFs after publishing (needs pypdfium2 and Pillow)")
+    sync_parser.add_argument("--shard", default=None, help="Only sync shard i of n (0-based, e.g. 0/4), split by a stable hash of the username")
+    sync_parser.add_argument("--no-optimize", dest="optimize", action="store_false", default=Config.OPTIMIZE,
+                             help="Publish raw Overleaf PDFs without linearization/recompression")
+    sync_parser.add_argument("--summary", default=None, help="Write the run summary as JSON to this file")
+    sync_parser.add_argument("--metrics", default=None, help="Write per-stage timing metrics as JSON to this file")
     sync_parser.set_defaults(func=run_sync)
 
     # Command: server
     server_parser = subparsers.add_parser("server", help="Run the API server")
     server_parser.add_argument("--host", default="0.0.0.0", help="Host to bind")
     server_parser.add_argument("--port", type=int, default=8000, help="Port to bind")
+    server_parser.add_argument("--trace", default=None, type=trace_policy, metavar="POLICY",
+                               help="Keep traces of slow or failed mirror jobs, e.g. 'slow>20s'")
     server_parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
     server_parser.set_defaults(func=run_server)
 
+    # Command: bench
+    int_list = lambda value: [int(v) for v in value.split(",")]
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the bot against a local fake Overleaf")
+    bench_parser.add_argument("--projects", type=int_list, default=[10], help="Comma-separated project counts")
+    bench_parser.add_argument("--concurrency", type=int_list, default=[1, 3], help="Comma-separated max_concurrent values")
+    bench_parser.add_argument("--render-delay", type=float, default=0.5, help="Seconds before the editor shows 'Download PDF'")
+    bench_parser.add_argument("--pdf-size", type=int, default=200_000, help="Size of the served PDFs in bytes")
+    bench_parser.add_argument("--compile-delay", type=float, default=0.0, help="Seconds the compile endpoint takes")
+    bench_parser.add_argument("--fetch", choices=["auto", "http", "browser"], default="browser", help="PDF retrieval mode")
+    bench_parser.add_argument("--read-links", action="store_true", help="Use /read/ links (join interstitial)")
+    bench_parser.add_argument("--output", default="bench.json", help="JSON report path")
+    bench_parser.set_defaults(func=run_bench)
+
+    # Command: publish
+    publish_parser = subparsers.add_parser("publish", help="Upload changed public files to a directory or S3-compatible bucket")
+    publish_parser.add_argument("--target", default=Config.PUBLISH_TARGET, required=not Config.PUBLISH_TARGET,
+                                help="Destination: a directory path or s3://bucket/prefix")
+    publish_parser.add_argument("--endpoint-url", default=Config.S3_ENDPOINT, help="S3-compatible endpoint (MinIO, R2, ...)")
+    publish_parser.add_argument("--jobs", type=int, default=8, help="Parallel uploads")
+    publish_parser.add_argument("--delete", action="store_true", help="Delete remote files that no longer exist locally")
+    publish_parser.add_argument("--dry-run", action="store_true", help="Only report what would be uploaded")
+    publish_parser.set_defaults(func=run_publish)
+
+    # Command: gc
+    gc_parser = subparsers.add_parser("gc", help="Prune old PDF versions and delete unreferenced blobs")
+    gc_parser.add_argument("--keep", type=int, default=Config.KEEP_VERSIONS, help="Versions to keep per user")
+    gc_parser.add_argument("--keep-days", type=float, default=Config.KEEP_DAYS, help="Also keep versions younger than this many days")
+    gc_parser.add_argument("--grace", type=int, default=3600, help="Never delete blobs written within this many seconds")
+    gc_parser.set_defaults(func=run_gc)
+
+    # Command: history
+    history_parser = subparsers.add_parser("history", help="List the stored PDF versions of a user")
+    history_parser.add_argument("nickname", help="User nickname")
+    history_parser.set_defaults(func=run_history)
+
+    # Command: rollback
+    rollback_parser = subparsers.add_parser("rollback", help="Republish an older stored PDF version")
+    rollback_parser.add_argument("nickname", help="User nickname")
+    rollback_parser.add_argument("sha", help="Version hash (or a unique prefix), see 'history'")
+    rollback_parser.set_defaults(func=run_rollback)
+
+    # Command: previews
+    previews_parser = subparsers.add_parser("previews", help="Pre-render preview images of the published PDFs")
+    previews_parser.add_argument("nicknames", nargs="*", help="Only these users (default: all)")
+    previews_parser.set_defaults(func=run_previews)
+
     # Command: user
+
     user_parser = subparsers.add_parser("user", help="Manage users")
     user_subparsers = user_parser.add_subparsers(dest="user_command", required=True)
 
@@ -1,6 +1,9 @@
 import os
-import json
 from dotenv import load_dotenv
+from backend.blobs import BlobStore
+from backend.previews import PreviewCache
+from overleaf_bot.tracing import Tracer
+from backend.store import JsonUserStore, SqliteUserStore
 
 load_dotenv()
 
@@ -11,13 +14,87 @@ class Config:
     PUBLIC_DIR = "public"
     PDF_DIR = os.path.join(PUBLIC_DIR, "pdfs")
     USERS_FILE = os.path.join(PUBLIC_DIR, "users.json")
+    MANIFEST_FILE = os.path.join(PUBLIC_DIR, "sync_manifest.json")
+    SCHEDULE_FILE = os.path.join(PUBLIC_DIR, "sync_schedule.json")
+    # Browser downloads land here and are moved into PDF_DIR, so keep both on one filesystem.
+    DOWNLOADS_DIR = os.getenv("OVERLINK_DOWNLOADS_DIR", ".downloads")
+    MAX_PDF_SIZE = int(os.getenv("OVERLINK_MAX_PDF_SIZE", str(100 * 1024 * 1024)))
+    BLOB_DIR = os.path.join(PUBLIC_DIR, "blobs")
+    VERSIONS = os.getenv("OVERLINK_VERSIONS", "1") != "0"
+    KEEP_VERSIONS = int(os.getenv("OVERLINK_KEEP_VERSIONS", "10"))
+    KEEP_DAYS = float(os.getenv("OVERLINK_KEEP_DAYS", "30"))
+    # Rendered page previews, keyed by PDF hash; kept outside public/ so they are never published.
+    PREVIEW_DIR = os.getenv("OVERLINK_PREVIEW_DIR", "previews")
+    PREVIEW_WIDTHS = [int(w) for w in os.getenv("OVERLINK_PREVIEW_WIDTHS", "240,480,960").split(",")]
+    PREVIEW_PAGES = int(os.getenv("OVERLINK_PREVIEW_PAGES", "1"))
+    PREVIEW_MAX_BYTES = int(os.getenv("OVERLINK_PREVIEW_MAX_BYTES", str(256 * 1024 * 1024)))
+    PUBLISH_TARGET = os.getenv("OVERLINK_PUBLISH_TARGET")
+    S3_ENDPOINT = os.getenv("OVERLINK_S3_ENDPOINT")
+    # Learned per-project metadata (canonical IDs, joined state, editor load times), next to the users registry.
+    PROJECT_CACHE_FILE = os.getenv("OVERLINK_PROJECT_CACHE", "project_cache.json")
+    JOURNAL_FILE = os.getenv("OVERLINK_JOURNAL_FILE", "sync_journal.jsonl")
+    FETCH_MODE = os.getenv("OVERLINK_FETCH_MODE", "auto")
+    RATE = float(os.getenv("OVERLINK_RATE", "2"))
+    BURST = int(os.getenv("OVERLINK_BURST", "4"))
+    JITTER = float(os.getenv("OVERLINK_JITTER", "0"))
+    OPTIMIZE = os.getenv("OVERLINK_OPTIMIZE", "1") != "0"
+    POOL_SIZE = int(os.getenv("OVERLINK_POOL_SIZE", "2"))
+    WORKERS = int(os.getenv("OVERLINK_WORKERS", os.getenv("OVERLINK_POOL_SIZE", "2")))
+    MIN_CONCURRENCY = int(os.getenv("OVERLINK_MIN_CONCURRENCY", "1"))
+    MAX_CONCURRENCY = int(os.getenv("OVERLINK_MAX_CONCURRENCY", "8"))
+    # Browser contexts are replaced after this many jobs, or while Chromium uses more than MAX_BROWSER_RSS MB (0 = off).
+    RECYCLE_JOBS = int(os.getenv("OVERLINK_RECYCLE_JOBS", "50"))
+    MAX_BROWSER_RSS = int(os.getenv("OVERLINK_MAX_BROWSER_RSS", "1536"))
+    # Opt-in job tracing: "slow>20s" keeps traces of slow or failed jobs, "failed" or "all" (unset = off).
+    TRACE = os.getenv("OVERLINK_TRACE")
+    TRACE_DIR = os.getenv("OVERLINK_TRACE_DIR", "traces")
+    TRACE_KEEP = int(os.getenv("OVERLINK_TRACE_KEEP", "50"))
+    TRACE_MAX_MB = int(os.getenv("OVERLINK_TRACE_MAX_MB", "500"))
+    TRACE_DAYS = float(os.getenv("OVERLINK_TRACE_DAYS", "7"))
+    JOB_TIMEOUT = float(os.getenv("OVERLINK_JOB_TIMEOUT", "180"))
+    MAX_QUEUE_DEPTH = int(os.getenv("OVERLINK_MAX_QUEUE_DEPTH", "100"))
+    JOBS_DB = os.getenv("OVERLINK_JOBS_DB", "jobs.db")
+    USER_STORE = os.getenv("OVERLINK_USER_STORE", "sqlite")
+    DB_FILE = os.getenv("OVERLINK_DB_FILE", "users.db")
+
+    _store = None
+    _previews = None
+
+    @classmethod
+    def user_store(cls):
+        """The user registry backend (SQLite by default, seeded from users.json)."""
+        if cls._store is None:
+            if cls.USER_STORE == "json":
+                cls._store = JsonUserStore(cls.USERS_FILE)
+            else:
+                cls._store = SqliteUserStore(cls.DB_FILE, seed_json=cls.USERS_FILE)
+        return cls._store
     
     @classmethod
     def load_users(cls):
-        if not os.path.exists(cls.USERS_FILE):
-            return []
-        with open(cls.USERS_FILE, "r") as f:
-            return json.load(f)
+        return cls.user_store().all()
+
+    @classmethod
+    def blob_store(cls):
+        """The version history store, or None when OVERLINK_VERSIONS=0."""
+        return BlobStore(cls.BLOB_DIR) if cls.VERSIONS else None
+
+    @classmethod
+    def preview_cache(cls):
+        """The shared preview cache (one instance, so its size accounting covers every writer)."""
+        if cls._previews is None:
+            cls._previews = PreviewCache(cls.PREVIEW_DIR, widths=cls.PREVIEW_WIDTHS, max_pages=cls.PREVIEW_PAGES,
+                                         max_bytes=cls.PREVIEW_MAX_BYTES)
+        return cls._previews
+
+    @classmethod
+    def tracer(cls, policy=None):
+        """A Tracer for `policy` (default OVERLINK_TRACE) with the configured retention, or None when tracing is off."""
+        policy = policy or cls.TRACE
+        if not policy:
+            return None
+        return Tracer(cls.TRACE_DIR, policy, max_traces=cls.TRACE_KEEP, max_bytes=cls.TRACE_MAX_MB * 1024 * 1024,
+                      max_age_days=cls.TRACE_DAYS)
 
     @classmethod
     def ensure_public_dir(cls):
@@ -25,15 +102,13 @@ class Config:
         os.makedirs(cls.PDF_DIR, exist_ok=True)
 
     @classmethod
-    def save_users(cls, users):
+    def export_users(cls):
+        """Writes the registry to the public users.json for the static site."""
         cls.ensure_public_dir()
-        with open(cls.USERS_FILE, "w") as f:
-            json.dump(users, f, indent=4)
+        cls.user_store().export(cls.USERS_FILE)
 
     @classmethod
-    def add_user(cls, nickname, email, project_id):
-        users = cls.load_users()
-        
+    def add_user(cls, nickname, email, project_id, export=True):
         # Handle different input formats
         if project_id.startswith("http"):
             url = project_id
@@ -53,26 +128,14 @@ class Config:
             "url": url
         }
         
-        updated = False
-        for i, user in enumerate(users):
-            if user["username"] == nickname:
-                users[i] = new_user
-                updated = True
-                break
-        
-        if not updated:
-            users.append(new_user)
-            
-        cls.save_users(users)
+        updated = cls.user_store().upsert(new_user)
+        if export:
+            cls.export_users()
         return updated
 
     @classmethod
-    def delete_user(cls, nickname):
-        users = cls.load_users()
-        initial_count = len(users)
-        users = [u for u in users if u["username"] != nickname]
-        
-        if len(users) < initial_count:
-            cls.save_users(users)
-            return True
-        return False
+    def delete_user(cls, nickname, email=None, export=True):
+        deleted = cls.user_store().delete(nickname, email)
+        if deleted and export:
+            cls.export_users()
+        return deleted
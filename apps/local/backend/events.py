@@ -0,0 +1,132 @@
+import asyncio
+import json
+from collections import deque
+
+
+class Event:
+    """A published event. It is serialized once; every subscriber gets the same bytes."""
+
+    __slots__ = ("id", "type", "data", "json", "_sse")
+
+    def __init__(self, event_id, event_type, data):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.json = json.dumps({"id": event_id, "type": event_type, **data})
+        self._sse = None
+
+    @property
+    def final(self):
+        return self.type in ("result", "error")
+
+    @property
+    def ndjson(self):
+        return self.json + "\n"
+
+    @property
+    def sse(self):
+        if self._sse is None:
+            self._sse = f"id: {self.id}\nevent: {self.type}\ndata: {self.json}\n\n"
+        return self._sse
+
+
+class Channel:
+    """The events of one topic: a bounded replay buffer plus a wake-up signal for subscribers."""
+
+    def __init__(self, replay):
+        self.buffer = deque(maxlen=replay)
+        self.next_id = 1
+        self.closed = False
+        self._published = asyncio.Event()
+
+    def publish(self, event_type, data):
+        event = Event(self.next_id, event_type, data)
+        self.next_id += 1
+        self.buffer.append(event)
+        if event.final:
+            self.closed = True
+        # Wake every current subscriber, then arm a fresh signal for the next event.
+        self._published.set()
+        self._published = asyncio.Event()
+        return event
+
+    def since(self, last_id):
+        """Buffered events after `last_id` (older ones may have been dropped from the buffer)."""
+        if not self.buffer or last_id >= self.buffer[-1].id:
+            return []
+        start = max(0, last_id + 1 - self.buffer[0].id)
+        return [self.buffer[i] for i in range(start, len(self.buffer))]
+
+    async def wait(self, timeout=None):
+        """Waits for the next event. Returns False if `timeout` seconds passed first."""
+        try:
+            await asyncio.wait_for(self._published.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class EventBus:
+    """
+    In-process fan-out of status events, keyed by topic (a job ID).
+
+    Publishing appends to the topic's replay buffer and wakes its subscribers; it
+    never waits for them, and the cost does not depend on how many there are.
+    Subscribers attach at any time, replay what is still buffered after their
+    Last-Event-ID and then follow live events until the final one. A closed
+    topic stays replayable for `linger` seconds.
+    """
+
+    def __init__(self, replay=256, linger=60.0):
+        self.replay = replay
+        self.linger = linger
+        self.channels = {}
+        self._opened = asyncio.Event()
+
+    def open(self, topic):
+        channel = self.channels.get(topic)
+        if channel is None or channel.closed:
+            channel = self.channels[topic] = Channel(self.replay)
+            self._opened.set()
+            self._opened = asyncio.Event()
+        return channel
+
+    def publish(self, topic, event_type, **data):
+        channel = self.channels.get(topic) or self.open(topic)
+        event = channel.publish(event_type, data)
+        if event.final:
+            asyncio.get_running_loop().call_later(self.linger, self._expire, topic, channel)
+        return event
+
+    def _expire(self, topic, channel):
+        if self.channels.get(topic) is channel:
+            del self.channels[topic]
+
+    async def wait_open(self, topic, timeout):
+        """Waits up to `timeout` seconds for `topic` to be opened. Returns its channel or None."""
+        if topic not in self.channels:
+            try:
+                await asyncio.wait_for(self._opened.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.channels.get(topic)
+
+    async def subscribe(self, topic, last_event_id=0, heartbeat=None):
+        """
+        Yields the events of `topic` after `last_event_id` until the final event.
+        With `heartbeat` set, yields None after that many idle seconds (for keep-alives).
+        """
+        channel = self.channels.get(topic)
+        last_id = last_event_id or 0
+        while channel is not None:
+            events = channel.since(last_id)
+            for event in events:
+                yield event
+                if event.final:
+                    return
+            if events:
+                last_id = events[-1].id
+            elif channel.closed:
+                return
+            elif not await channel.wait(heartbeat):
+                yield None
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from backend.events import Event, EventBus
+from backend.logger import log_context, setup_logger
+
+logger = setup_logger()
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class QueueFull(Exception):
+    """Raised when the queue already holds `max_depth` unfinished jobs."""
+
+
+class JobQueue:
+    """
+    Durable FIFO of jobs in SQLite (WAL).
+    Jobs left running by a crashed process are re-queued on startup.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            message TEXT,
+            result TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+    """
+
+    def __init__(self, path, max_depth=100):
+        self.path = path
+        self.max_depth = max_depth
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_job(row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def depth(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+
+    def enqueue(self, kind, payload):
+        """Adds a job and returns its ID. Raises QueueFull over the depth limit."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+                if self.max_depth and depth >= self.max_depth:
+                    raise QueueFull(f"{depth} jobs pending")
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, json.dumps(payload), QUEUED, now, now)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self):
+        """Atomically marks the oldest queued job as running and returns it (or None)."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (RUNNING, time.time(), row["id"])
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job = self._to_job(row)
+        job["status"] = RUNNING
+        job["attempts"] += 1
+        return job
+
+    def update(self, job_id, status=None, message=None, result=None):
+        sets, params = ["updated_at = ?"], [time.time()]
+        if status:
+            sets.append("status = ?")
+            params.append(status)
+        if message is not None:
+            sets.append("message = ?")
+            params.append(message)
+        if result is not None:
+            sets.append("result = ?")
+            params.append(json.dumps(result))
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE id = ?", (*params, job_id))
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def cancel_queued(self, job_id, message="Cancelled."):
+        """Fails a job that has not started yet. Returns False if it was already claimed or finished."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (FAILED, message, time.time(), job_id, QUEUED)
+            )
+        return cur.rowcount > 0
+
+    def requeue_running(self):
+        """Puts jobs interrupted by a restart back into the queue."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?", (QUEUED, time.time(), RUNNING)
+            )
+        return cur.rowcount
+
+
+class WorkerPool:
+    """
+    Fixed number of asyncio workers consuming a JobQueue.
+
+    `handler(job, emit)` runs one job and returns its result dict; `emit(message)`
+    records a status update. Status events are published on an EventBus keyed by
+    job ID, so any number of clients can follow (and reconnect to) a running job.
+    """
+
+    def __init__(self, queue, handler, size=2, poll_interval=1.0, bus=None):
+        self.queue = queue
+        self.handler = handler
+        self.size = size
+        self.poll_interval = poll_interval
+        self.bus = bus or EventBus()
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self._running = {}
+        self._cancelled = set()
+
+    async def start(self):
+        requeued = await asyncio.to_thread(self.queue.requeue_running)
+        if requeued:
+            logger.info("Re-queued %s interrupted jobs.", requeued)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.size)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind, payload):
+        job_id = await asyncio.to_thread(self.queue.enqueue, kind, payload)
+        self._wakeup.set()
+        return job_id
+
+    async def cancel(self, job_id):
+        """
+        Cancels a queued or running job. A running job's handler is cancelled,
+        which closes its page and returns its browser context to the pool.
+        Returns False if the job is unknown or already finished.
+        """
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+            return True
+        return await asyncio.to_thread(self.queue.cancel_queued, job_id)
+
+    def emit(self, job_id, event_type, **data):
+        return self.bus.publish(job_id, event_type, **data)
+
+    async def stream(self, job_id, last_event_id=0, heartbeat=None):
+        """
+        Yields the status events of a job (buffered ones after `last_event_id`, then
+        live ones) until it finishes. With `heartbeat`, yields None when idle that long.
+        """
+        while job_id not in self.bus.channels:
+            # Not running in this process (finished earlier or still queued): report stored state.
+            job = await asyncio.to_thread(self.queue.get, job_id)
+            if job is None or job["status"] in FINISHED:
+                if job is not None:
+                    yield self._final_event(job)
+                return
+            if await self.bus.wait_open(job_id, self.poll_interval) is None and heartbeat:
+                yield None
+        async for event in self.bus.subscribe(job_id, last_event_id, heartbeat):
+            yield event
+
+    @staticmethod
+    def _final_event(job):
+        if job["status"] == SUCCEEDED:
+            return Event(0, "result", job["result"] or {})
+        return Event(0, "error", {"message": job["message"] or "Job failed."})
+
+    async def _worker(self, index):
+        while True:
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job):
+        # The handler task inherits the context, so everything it logs carries the job ID.
+        with log_context(job=job["id"]):
+            await self._execute(job)
+
+    async def _execute(self, job):
+        job_id = job["id"]
+        self.bus.open(job_id)
+
+        async def emit(message):
+            self.emit(job_id, "status", message=message)
+            await asyncio.to_thread(self.queue.update, job_id, message=message)
+
+        task = asyncio.create_task(self.handler(job, emit))
+        self._running[job_id] = task
+        try:
+            result = await task
+            await asyncio.to_thread(self.queue.update, job_id, status=SUCCEEDED, result=result)
+            self.emit(job_id, "result", **result)
+        except asyncio.CancelledError:
+            if job_id not in self._cancelled:
+                # Shutting down: leave the job as running so it is re-queued on restart.
+                raise
+            logger.info("Job %s cancelled.", job_id)
+            await asyncio.to_thread(self.queue.update, job_id, status=FAILED, message="Cancelled.")
+            self.emit(job_id, "error", message="Cancelled.")
+        except Exception as e:
+            logger.error("Job %s failed: %s", job_id, e)
+            await asyncio.to_thread(self.queue.update, job_id, status=FAILED, message=str(e))
+            self.emit(job_id, "error", message=str(e))
+        finally:
+            self._running.pop(job_id, None)
+            self._cancelled.discard(job_id)
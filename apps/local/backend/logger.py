@@ -1,15 +1,5 @@
-import logging
-import sys
+# The app logs through the bot's queue-based logger, so both share one handler,
+# one output format and one log context (job, project, stage).
+from overleaf_bot.logger import log_context, setup_logger, stop_logging
 
-def setup_logger(name="overlink"):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    
-    if not logger.handlers:
-        logger.addHandler(handler)
-        
-    return logger
+__all__ = ["log_context", "setup_logger", "stop_logging"]
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import time
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SyncManifest:
+    """
+    Per-user record of the last published PDF (sha256, size, last change, source URL).
+    Used to leave byte-identical downloads untouched so nothing downstream
+    (git commit, Pages upload, CDN) sees a change.
+
+    :param store: Optional BlobStore keeping every published version; the
+        published PDF then links to the latest blob instead of being replaced.
+    """
+
+    def __init__(self, path, store=None):
+        self.path = path
+        self.store = store
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        return self.entries
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.entries, f, indent=4, sort_keys=True)
+        os.replace(temp_path, self.path)
+        if self.store is not None:
+            self.store.save()
+
+    def get(self, username):
+        return self.entries.get(username)
+
+    def remove(self, username):
+        return self.entries.pop(username, None) is not None
+
+    def source_unchanged(self, username, source_sha, target_path):
+        """True if the raw download `source_sha` is what produced the published PDF."""
+        entry = self.entries.get(username)
+        return bool(entry) and entry.get("source_sha256") == source_sha and os.path.exists(target_path)
+
+    def apply(self, username, staged_path, target_path, source_url, report=None, sha=None):
+        """
+        Publishes staged_path to target_path only if its content changed.
+        The staged file is consumed either way.
+        :param report: Optional post-processing report; its input hash identifies
+            the raw download, so an unchanged source is detected without rehashing.
+        :param sha: sha256 of the raw download, if already computed while downloading.
+        Returns True if the target was replaced.
+        """
+        entry = self.entries.get(username)
+        source_sha = report["input_sha256"] if report else None
+        if report:
+            # Unless a stage rewrote it, the staged file is still the raw download.
+            sha = None if report["stages"] else source_sha
+        unchanged = source_sha is not None and self.source_unchanged(username, source_sha, target_path)
+        if not unchanged:
+            sha = sha or file_sha256(staged_path)
+            unchanged = bool(entry) and entry.get("sha256") == sha and os.path.exists(target_path)
+        if unchanged:
+            os.remove(staged_path)
+            if entry.get("url") != source_url:
+                entry["url"] = source_url
+            return False
+
+        if self.store is not None:
+            self.store.publish(username, staged_path, target_path, sha, source_url)
+        else:
+            os.replace(staged_path, target_path)
+        self.entries[username] = {
+            "sha256": sha,
+            "size": os.path.getsize(target_path),
+            "changed_at": int(time.time()),
+            "url": source_url
+        }
+        if report:
+            self.entries[username].update(
+                source_sha256=source_sha,
+                source_size=report["before"],
+                stages=report["stages"]
+            )
+        return True
+
+    def rollback(self, username, sha_prefix, target_path):
+        """
+        Republishes a stored older version. The next sync republishes the
+        Overleaf version again if it differs. Returns the version, or None.
+        """
+        version = self.store.rollback(username, sha_prefix, target_path) if self.store else None
+        if version is None:
+            return None
+        self.entries[username] = {
+            "sha256": version["sha256"],
+            "size": version["size"],
+            "changed_at": int(time.time()),
+            "url": version.get("url") or (self.entries.get(username) or {}).get("url")
+        }
+        return version
@@ -0,0 +1,240 @@
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from backend.config import Config
+from backend.manifest import SyncManifest, file_sha256
+from backend.previews import FORMATS, PreviewUnavailable
+
+router = APIRouter()
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+STABLE_TTL = "public, max-age=60"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+SHA_RE = re.compile(r"^[0-9a-f]{64}$")
+# Hashes of published PDFs the manifest does not describe, most recently used last.
+HASH_CACHE_SIZE = 256
+
+_manifest_cache = {"mtime": None, "manifest": None}
+_hash_cache = OrderedDict()
+# In-flight renders, so concurrent requests for one PDF render it once.
+_renders = {}
+
+
+def _manifest():
+    """The sync manifest, re-read only when the file changes."""
+    try:
+        mtime = os.path.getmtime(Config.MANIFEST_FILE)
+    except OSError:
+        mtime = None
+    if _manifest_cache["manifest"] is None or _manifest_cache["mtime"] != mtime:
+        _manifest_cache["manifest"] = SyncManifest(Config.MANIFEST_FILE)
+        _manifest_cache["mtime"] = mtime
+    return _manifest_cache["manifest"]
+
+
+async def current_version(name):
+    """
+    Returns (path, sha256, mtime) of the published PDF of `name`, or None.
+    Uses the manifest hash when it matches the file, otherwise hashes the file
+    (in a worker thread) once per mtime.
+    """
+    if "/" in name or name.startswith("."):
+        return None
+    path = os.path.join(Config.PDF_DIR, f"{name}.pdf")
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    entry = _manifest().get(name)
+    if entry and entry.get("size") == stat.st_size and entry.get("changed_at", 0) >= int(stat.st_mtime):
+        return path, entry["sha256"], stat.st_mtime
+    key = (path, stat.st_mtime, stat.st_size)
+    sha = _hash_cache.get(key)
+    if sha is None:
+        sha = await asyncio.to_thread(file_sha256, path)
+        _hash_cache[key] = sha
+        if len(_hash_cache) > HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+    _hash_cache.move_to_end(key)
+    return path, sha, stat.st_mtime
+
+
+def versioned_url(name, sha):
+    return f"/pdf/{name}/{sha}.pdf"
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(header, size):
+    """Parses a single "bytes=a-b" range. Returns (start, end) inclusive, None for no/unsupported range."""
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if start == "":
+        if end == "":
+            return None
+        start, end = max(0, size - int(end)), size - 1
+    else:
+        start, end = int(start), int(end) if end else size - 1
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def _iter_file(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_pdf(request, path, sha, mtime, cache_control):
+    """Serves a PDF with a strong ETag, conditional GET and single byte-range support."""
+    etag = f'"{sha}"'
+    size = os.path.getsize(path)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes"
+    }
+    if _not_modified(request, etag, mtime):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        byte_range = _parse_range(request.headers.get("range"), size)
+
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(size)
+        return Response(status_code=200, headers=headers, media_type="application/pdf")
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_iter_file(path, 0, size), headers=headers, media_type="application/pdf")
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(_iter_file(path, start, length), status_code=206, headers=headers, media_type="application/pdf")
+
+
+def stored_version(name, sha):
+    """Returns (path, sha256, mtime) of a retained older version of `name` from the version store, or None."""
+    store = Config.blob_store()
+    version = store.find(name, sha) if store and len(sha) == 64 else None
+    if version is None:
+        return None
+    path = store.blob_path(version["sha256"])
+    return (path, version["sha256"], version["added_at"]) if os.path.exists(path) else None
+
+
+@router.api_route("/pdf/{name}/{sha}.pdf", methods=["GET", "HEAD"])
+async def get_versioned_pdf(name: str, sha: str, request: Request):
+    """Immutable, content-addressed PDF URL (current or any retained version)."""
+    version = await current_version(name)
+    if version is None or version[1] != sha:
+        version = stored_version(name, sha)
+    if version is None:
+        raise HTTPException(status_code=404, detail="PDF version not found.")
+    path, sha, mtime = version
+    return serve_pdf(request, path, sha, mtime, IMMUTABLE)
+
+
+@router.api_route("/pdf/{name}.pdf", methods=["GET", "HEAD"])
+@router.api_route("/public/pdfs/{name}.pdf", methods=["GET", "HEAD"])
+async def get_current_pdf(name: str):
+    """Stable URL: short-lived redirect to the content-addressed URL of the current version."""
+    version = await current_version(name)
+    if version is None:
+        raise HTTPException(status_code=404, detail="PDF not found.")
+    return RedirectResponse(versioned_url(name, version[1]), status_code=302, headers={"Cache-Control": STABLE_TTL})
+
+
+def preview_url(name, sha, page=1, width=None, fmt="webp"):
+    width = width or Config.PREVIEW_WIDTHS[0]
+    return f"/preview/{name}/{sha}/p{page}-w{width}.{fmt}"
+
+
+async def render_preview(pdf_path, sha, page, fmt):
+    """Renders the previews of one page of a PDF in a worker thread, sharing the render between requests."""
+    key = (sha, page, fmt)
+    task = _renders.get(key)
+    if task is None:
+        cache = Config.preview_cache()
+        task = asyncio.ensure_future(asyncio.to_thread(cache.render, pdf_path, sha, [page], [fmt]))
+        _renders[key] = task
+        task.add_done_callback(lambda _: _renders.pop(key, None))
+    await asyncio.shield(task)
+
+
+def _preview_params(page, width, fmt):
+    cache = Config.preview_cache()
+    if not cache.available():
+        raise HTTPException(status_code=503, detail="Previews need pypdfium2 and Pillow on the server.")
+    width = width or cache.widths[0]
+    if not cache.valid(page, width, fmt):
+        raise HTTPException(status_code=404, detail=f"Preview sizes: widths {list(cache.widths)}, "
+                                                    f"pages 1-{cache.max_pages}, formats {list(cache.formats())}.")
+    return cache, width
+
+
+@router.get("/preview/{name}/{sha}/p{page}-w{width}.{fmt}")
+async def get_versioned_preview(name: str, sha: str, page: int, width: int, fmt: str, request: Request):
+    """Immutable preview image of a PDF version, rendered on first request."""
+    cache, width = _preview_params(page, width, fmt)
+    if not SHA_RE.match(sha):
+        raise HTTPException(status_code=404, detail="PDF version not found.")
+    etag = f'"{sha}-p{page}-w{width}.{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    path = cache.path(sha, page, width, fmt)
+    if os.path.exists(path):
+        cache.touch(path)
+    else:
+        version = await current_version(name)
+        if version is None or version[1] != sha:
+            version = stored_version(name, sha)
+        if version is None:
+            raise HTTPException(status_code=404, detail="PDF version not found.")
+        try:
+            await render_preview(version[0], sha, page, fmt)
+        except PreviewUnavailable as e:
+            raise HTTPException(status_code=404, detail=f"No preview: {e}")
+    return FileResponse(path, media_type=FORMATS[fmt], headers=headers)
+
+
+@router.get("/preview/{name}.{fmt}")
+async def get_current_preview(name: str, fmt: str, page: int = 1, w: int = None):
+    """Stable preview URL: short-lived redirect to the immutable preview of the current version."""
+    _, width = _preview_params(page, w, fmt)
+    version = await current_version(name)
+    if version is None:
+        raise HTTPException(status_code=404, detail="PDF not found.")
+    return RedirectResponse(preview_url(name, version[1], page, width, fmt), status_code=302,
+                            headers={"Cache-Control": STABLE_TTL})
@@ -0,0 +1,153 @@
+import os
+import threading
+from backend.logger import setup_logger
+
+logger = setup_logger()
+
+try:
+    import pypdfium2
+    from PIL import Image, features
+except ImportError:  # optional dependencies, only needed to render previews
+    pypdfium2 = None
+
+FORMATS = {"webp": "image/webp", "png": "image/png"}
+
+
+class PreviewUnavailable(Exception):
+    """The requested preview cannot exist (page out of range, unreadable PDF)."""
+
+
+class PreviewCache:
+    """
+    Rendered page previews of published PDFs, keyed by the PDF content hash:
+    <root>/<sha[:2]>/<sha>-p<page>-w<width>.<format>. A preview never changes once
+    written, so it can be served as immutable. Only the configured widths and the
+    first `max_pages` pages are rendered, which bounds the number of variants per PDF.
+
+    Reads touch the file's mtime; when the cache grows beyond `max_bytes` the least
+    recently used previews are deleted first.
+    """
+
+    def __init__(self, root, widths=(240, 480, 960), max_pages=1, max_bytes=256 * 1024 * 1024, quality=80):
+        self.root = root
+        self.widths = tuple(sorted(widths))
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available():
+        return pypdfium2 is not None
+
+    @staticmethod
+    def formats():
+        """Formats this build can encode; WebP needs Pillow built with libwebp."""
+        if pypdfium2 is None:
+            return ()
+        return ("webp", "png") if features.check("webp") else ("png",)
+
+    def path(self, sha, page, width, fmt):
+        return os.path.join(self.root, sha[:2], f"{sha}-p{page}-w{width}.{fmt}")
+
+    def valid(self, page, width, fmt):
+        return 1 <= page <= self.max_pages and width in self.widths and fmt in self.formats()
+
+    @staticmethod
+    def touch(path):
+        """Marks a preview as used, for LRU eviction."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def render(self, pdf_path, sha, pages=None, formats=None):
+        """
+        Renders the missing previews of `pdf_path` for every configured width.
+        Each page is rasterized once at the largest width and downscaled for the others.
+        Returns the number of files written.
+        """
+        requested = pages is not None
+        pages = pages if requested else range(1, self.max_pages + 1)
+        formats = formats or self.formats()
+        written = 0
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            for number in pages:
+                if number > len(document):
+                    if requested:
+                        raise PreviewUnavailable(f"PDF has {len(document)} page(s)")
+                    break
+                missing = [(w, f) for w in self.widths for f in formats
+                           if not os.path.exists(self.path(sha, number, w, f))]
+                if not missing:
+                    continue
+                page = document[number - 1]
+                scale = self.widths[-1] / page.get_width()
+                image = page.render(scale=scale).to_pil().convert("RGB")
+                page.close()
+                for width, fmt in missing:
+                    height = max(1, round(image.height * width / image.width))
+                    resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                    self._write(resized, self.path(sha, number, width, fmt), fmt)
+                    written += 1
+        except pypdfium2.PdfiumError as e:
+            raise PreviewUnavailable(str(e)) from e
+        finally:
+            document.close()
+        if written:
+            logger.info("Rendered %s preview(s) of %s.", written, sha[:12])
+            self.evict()
+        return written
+
+    def _write(self, image, path, fmt):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        if fmt == "webp":
+            image.save(temp_path, "WEBP", quality=self.quality, method=4)
+        else:
+            image.save(temp_path, "PNG", optimize=True)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Deletes least recently used previews until the cache fits `max_bytes`. Returns (files, bytes) removed."""
+        with self._lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return 0, 0
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            removed, freed = 0, 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+                freed += size
+            self._size = total
+        if removed:
+            logger.info("Evicted %s preview(s), freed %.1f MB.", removed, freed / (1024 * 1024))
+        return removed, freed
@@ -0,0 +1,223 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backend.manifest import SyncManifest, file_sha256
+from backend.logger import setup_logger
+
+logger = setup_logger()
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+except ImportError:  # optional dependency, only needed for s3:// targets
+    boto3 = None
+
+REMOTE_MANIFEST = "publish_manifest.json"
+# Internal state under public/ that is never published.
+EXCLUDED_DIRS = ("blobs",)
+EXCLUDED_FILES = (REMOTE_MANIFEST, "sync_manifest.json", "sync_schedule.json")
+EXCLUDED_SUFFIXES = (".new", ".tmp", ".link")
+# Uploaded after everything else, so the site never references a file that is not there yet.
+PUBLISH_LAST = ("users.json", "index.html")
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".json": "application/json",
+    ".html": "text/html",
+    ".js": "application/javascript",
+    ".css": "text/css",
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".webp": "image/webp"
+}
+
+
+def content_type(path):
+    return CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+
+def local_inventory(source_dir, manifest_file=None):
+    """
+    Maps each publishable file under `source_dir` (relative, "/"-separated) to
+    {"sha256", "size"}. PDFs recorded in the sync manifest reuse its hash
+    instead of being read again.
+    """
+    known = SyncManifest(manifest_file).entries if manifest_file else {}
+    inventory = {}
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        rel_dir = os.path.relpath(dirpath, source_dir)
+        if rel_dir == ".":
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
+        for name in filenames:
+            if name in EXCLUDED_FILES or name.endswith(EXCLUDED_SUFFIXES):
+                continue
+            path = os.path.join(dirpath, name)
+            rel = name if rel_dir == "." else f"{rel_dir}/{name}".replace(os.sep, "/")
+            stat = os.stat(path)
+            entry = known.get(name[:-len(".pdf")]) if rel.startswith("pdfs/") and name.endswith(".pdf") else None
+            if entry and entry.get("size") == stat.st_size and entry.get("changed_at", 0) >= int(stat.st_mtime):
+                sha = entry["sha256"]
+            else:
+                sha = file_sha256(path)
+            inventory[rel] = {"sha256": sha, "size": stat.st_size}
+    return inventory
+
+
+def diff(local, remote):
+    """Returns (paths to upload, paths to delete) to turn `remote` into `local`."""
+    uploads = [p for p, e in local.items() if (remote.get(p) or {}).get("sha256") != e["sha256"]]
+    deletes = [p for p in remote if p not in local]
+    uploads.sort(key=lambda p: (os.path.basename(p) in PUBLISH_LAST, p))
+    return uploads, deletes
+
+
+class Target:
+    """A publish destination. Paths are relative and "/"-separated."""
+
+    def read_manifest(self):
+        raise NotImplementedError
+
+    def write_manifest(self, manifest):
+        """Must replace the remote manifest atomically."""
+        raise NotImplementedError
+
+    def put(self, rel_path, local_path):
+        raise NotImplementedError
+
+    def delete(self, rel_path):
+        raise NotImplementedError
+
+
+class DirectoryTarget(Target):
+    """Publishes to a local (or mounted) directory; every file is replaced atomically."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, rel_path):
+        return os.path.join(self.root, *rel_path.split("/"))
+
+    def read_manifest(self):
+        path = self._path(REMOTE_MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            return json.load(f).get("files", {})
+
+    def write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(REMOTE_MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"updated_at": int(time.time()), "files": manifest}, f, indent=4, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def put(self, rel_path, local_path):
+        path = self._path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(local_path, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def delete(self, rel_path):
+        path = self._path(rel_path)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class S3Target(Target):
+    """
+    Publishes to an S3-compatible bucket (AWS, MinIO, R2, ...). Credentials come from
+    the usual AWS environment/config; `endpoint_url` selects a non-AWS service.
+    Files above `multipart_threshold` bytes are sent as multipart uploads.
+    """
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, multipart_threshold=8 * 1024 * 1024,
+                 part_size=8 * 1024 * 1024, pdf_cache_control="public, max-age=60"):
+        if boto3 is None:
+            raise RuntimeError("S3 publishing needs boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        # Parallelism is per file (see publish), so each transfer uses one thread.
+        self.transfer = TransferConfig(
+            multipart_threshold=multipart_threshold, multipart_chunksize=part_size, max_concurrency=1
+        )
+        self.pdf_cache_control = pdf_cache_control
+
+    def _key(self, rel_path):
+        return f"{self.prefix}/{rel_path}" if self.prefix else rel_path
+
+    def read_manifest(self):
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._key(REMOTE_MANIFEST))["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return {}
+        return json.loads(body).get("files", {})
+
+    def write_manifest(self, manifest):
+        # A single PUT replaces the object atomically for readers.
+        body = json.dumps({"updated_at": int(time.time()), "files": manifest}, indent=4, sort_keys=True)
+        self.client.put_object(
+            Bucket=self.bucket, Key=self._key(REMOTE_MANIFEST), Body=body.encode(),
+            ContentType="application/json", CacheControl="no-cache"
+        )
+
+    def put(self, rel_path, local_path):
+        extra = {"ContentType": content_type(rel_path)}
+        if rel_path.endswith(".pdf"):
+            extra["CacheControl"] = self.pdf_cache_control
+        self.client.upload_file(local_path, self.bucket, self._key(rel_path), ExtraArgs=extra, Config=self.transfer)
+
+    def delete(self, rel_path):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(rel_path))
+
+
+def parse_target(spec, endpoint_url=None):
+    """Parses --target: s3://bucket/prefix, or a directory path (optionally dir:/path)."""
+    if spec.startswith("s3://"):
+        bucket, _, prefix = spec[len("s3://"):].partition("/")
+        return S3Target(bucket, prefix, endpoint_url=endpoint_url)
+    return DirectoryTarget(spec[len("dir:"):] if spec.startswith("dir:") else spec)
+
+
+def publish(source_dir, target, jobs=8, delete=False, dry_run=False, manifest_file=None):
+    """
+    Uploads the files of `source_dir` that differ from the target's manifest,
+    `jobs` at a time, then replaces the remote manifest. Returns a summary dict.
+    """
+    started = time.time()
+    local = local_inventory(source_dir, manifest_file)
+    remote = target.read_manifest()
+    uploads, deletes = diff(local, remote)
+    if not delete:
+        deletes = []
+    summary = {
+        "files": len(local),
+        "uploaded": len(uploads),
+        "deleted": len(deletes),
+        "bytes": sum(local[p]["size"] for p in uploads),
+        "dry_run": dry_run
+    }
+    if dry_run or not (uploads or deletes):
+        summary["duration"] = round(time.time() - started, 3)
+        return summary
+
+    last = [p for p in uploads if os.path.basename(p) in PUBLISH_LAST]
+    first = [p for p in uploads if p not in last]
+    local_path = lambda rel: os.path.join(source_dir, *rel.split("/"))
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        for batch in (first, last):
+            # list() re-raises the first upload error, before the manifest is touched.
+            list(executor.map(lambda rel: target.put(rel, local_path(rel)), batch))
+
+    published = {p: e for p, e in remote.items() if p not in deletes}
+    published.update({p: local[p] for p in uploads})
+    target.write_manifest(published)
+    # Removed files disappear only once the new manifest no longer lists them.
+    for rel in deletes:
+        target.delete(rel)
+
+    summary["duration"] = round(time.time() - started, 3)
+    logger.info("Published %s file(s) (%s bytes), deleted %s, in %ss.", len(uploads), summary["bytes"], len(deletes), summary["duration"])
+    return summary
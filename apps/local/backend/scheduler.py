@@ -0,0 +1,87 @@
+import heapq
+import json
+import os
+import time
+
+HISTORY_SIZE = 8
+
+
+class SyncSchedule:
+    """
+    Per-project polling schedule driven by change history.
+
+    Projects that change often are polled at a short interval (about half their
+    typical gap between changes); every unchanged check doubles the interval
+    up to `max_interval`. New projects, and projects whose published PDF is missing
+    (e.g. the version store was not restored), are due immediately.
+    """
+
+    def __init__(self, path, min_interval=3600, max_interval=7 * 86400):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        return self.entries
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.entries, f, indent=4, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def next_due(self, username):
+        entry = self.entries.get(username)
+        return entry["next_due"] if entry else 0
+
+    def due(self, users, now=None, limit=None, missing=None):
+        """
+        Returns the users whose next check is due, most overdue first.
+        :param limit: Optional cap on the number of projects per cycle.
+        :param missing: Optional predicate(user), true when the user's PDF is not published;
+            such users are due now whatever their history.
+        """
+        now = time.time() if now is None else now
+        heap = [(0 if missing and missing(u) else self.next_due(u["username"]), i, u) for i, u in enumerate(users)]
+        heapq.heapify(heap)
+        selected = []
+        while heap and heap[0][0] <= now and (limit is None or len(selected) < limit):
+            selected.append(heapq.heappop(heap)[2])
+        return selected
+
+    def earliest_due(self, users, missing=None):
+        return min((0 if missing and missing(u) else self.next_due(u["username"]) for u in users), default=None)
+
+    def _interval_after_change(self, changes):
+        if len(changes) < 2:
+            return self.min_interval
+        gaps = [b - a for a, b in zip(changes, changes[1:])]
+        return sum(gaps) / len(gaps) / 2
+
+    def record(self, username, changed, now=None):
+        """Updates the history of a project after a successful check."""
+        now = time.time() if now is None else now
+        entry = self.entries.setdefault(username, {"interval": self.min_interval, "changes": []})
+        if changed:
+            entry["changes"] = (entry["changes"] + [int(now)])[-HISTORY_SIZE:]
+            interval = self._interval_after_change(entry["changes"])
+        else:
+            interval = entry["interval"] * 2
+        entry["interval"] = int(min(self.max_interval, max(self.min_interval, interval)))
+        entry["last_checked"] = int(now)
+        entry["next_due"] = int(now + entry["interval"])
+
+    def record_failure(self, username, now=None):
+        """Retries a failed project at the minimum interval without touching its history."""
+        now = time.time() if now is None else now
+        entry = self.entries.setdefault(username, {"interval": self.min_interval, "changes": []})
+        entry["next_due"] = int(now + self.min_interval)
+
+    def prune(self, usernames):
+        for username in set(self.entries) - set(usernames):
+            del self.entries[username]
@@ -1,19 +1,53 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import logging
-import json
+from contextlib import asynccontextmanager
 import asyncio
-from overleaf_bot.core import OverleafBot
+import os
+import threading
+from overleaf_bot.pool import BrowserPool
+from overleaf_bot.memory import MemoryWatchdog
+from overleaf_bot.project_cache import ProjectCache
+from overleaf_bot.deadline import Deadline
+from overleaf_bot.postprocess import default_pipeline
+from overleaf_bot.metrics import QUEUE_DEPTH, REGISTRY
 from backend.config import Config
+from backend.manifest import SyncManifest
+from backend.jobs import JobQueue, QueueFull, WorkerPool
+from backend.logger import setup_logger
+from backend.pdf_routes import router as pdf_router, versioned_url
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("server")
+logger = setup_logger("overlink.server")
 
-app = FastAPI(title="CV Mirror API")
+def source_unchanged(staged_path, sha):
+    """Pipeline skip check: the raw download already produced the published PDF."""
+    username = os.path.basename(staged_path)[:-len(".pdf.new")]
+    manifest = SyncManifest(Config.MANIFEST_FILE)
+    return manifest.source_unchanged(username, sha, os.path.join(Config.PDF_DIR, f"{username}.pdf"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Starts the shared browser pool and the mirror workers for the lifetime of the server."""
+    pipeline = default_pipeline(source_unchanged) if Config.OPTIMIZE else None
+    pool = BrowserPool(size=Config.POOL_SIZE, headless=True, auth_path=Config.AUTH_FILE, fetch_mode=Config.FETCH_MODE, postprocess=pipeline,
+                       downloads_path=Config.DOWNLOADS_DIR, max_pdf_size=Config.MAX_PDF_SIZE,
+                       project_cache=ProjectCache(Config.PROJECT_CACHE_FILE), max_uses=Config.RECYCLE_JOBS,
+                       watchdog=MemoryWatchdog(max_rss=Config.MAX_BROWSER_RSS * 1024 * 1024 or None),
+                       tracer=Config.tracer())
+    await pool.start(email=Config.EMAIL, password=Config.PASSWORD)
+    app.state.pool = pool
+    app.state.jobs = JobQueue(Config.JOBS_DB, max_depth=Config.MAX_QUEUE_DEPTH)
+    app.state.workers = WorkerPool(app.state.jobs, run_mirror_job, size=Config.WORKERS)
+    await app.state.workers.start()
+    try:
+        yield
+    finally:
+        await app.state.workers.stop()
+        await pool.stop()
+        await asyncio.to_thread(Config.export_users)
+
+app = FastAPI(title="CV Mirror API", lifespan=lifespan)
 
 # Allow CORS for frontend dev server
 app.add_middleware(
@@ -37,110 +71,180 @@ class DeleteRequest(BaseModel):
 # Ensure public dir exists
 Config.ensure_public_dir()
 
-# Mount public directory to serve PDFs
-app.mount("/public", StaticFiles(directory=Config.PUBLIC_DIR), name="public")
+# Coalesced users.json export: registry writes go to the store, the public
+# file is regenerated in a worker thread at most once at a time.
+_export_state = {"dirty": False, "task": None}
+
+async def _export_users_loop():
+    while _export_state["dirty"]:
+        _export_state["dirty"] = False
+        try:
+            await asyncio.to_thread(Config.export_users)
+        except Exception as e:
+            logger.error("Error exporting users.json: %s", e)
+
+def schedule_users_export():
+    _export_state["dirty"] = True
+    task = _export_state["task"]
+    if task is None or task.done():
+        _export_state["task"] = asyncio.create_task(_export_users_loop())
+
+# PDF routes: ETag, ranges, content-addressed URLs and /public/pdfs/<name>.pdf
+app.include_router(pdf_router)
+
+# Only the published files are served from public/: the version store (blobs/)
+# and the sync state files next to it stay private.
+@app.get("/public/users.json")
+async def users_json():
+    if not os.path.exists(Config.USERS_FILE):
+        raise HTTPException(status_code=404, detail="No users yet.")
+    return FileResponse(Config.USERS_FILE, media_type="application/json", headers={"Cache-Control": "no-cache"})
 
 @app.post("/api/mirror")
 async def mirror_cv(request: MirrorRequest):
     """
-    Mirrors the CV from Overleaf Project ID used by the Nickname.
-    Returns a stream of status updates ending with the final result.
+    Queues a mirror of the CV from the Overleaf Project ID used by the Nickname.
+    Returns the job ID; progress is available from the job endpoints.
     """
-    logger.info(f"Received request for {request.nickname} (ID: {request.project_id})")
+    logger.info("Received request for %s (ID: %s)", request.nickname, request.project_id)
     
-    # Save/Update user in users.json using Config
+    # Save/Update user in the registry using Config
     try:
-        updated = Config.add_user(request.nickname, request.email, request.project_id)
+        updated = await asyncio.to_thread(Config.add_user, request.nickname, request.email, request.project_id, False)
+        schedule_users_export()
         action = "Updated" if updated else "Added"
-        logger.info(f"{action} user: {request.nickname}")
+        logger.info("%s user: %s", action, request.nickname)
     except Exception as e:
-        logger.error(f"Error saving user data: {e}")
+        logger.error("Error saving user data: %s", e)
+
+    url = request.project_id if request.project_id.startswith("http") else f"https://www.overleaf.com/project/{request.project_id}"
+
+    try:
+        job_id = await app.state.workers.submit("mirror", {"nickname": request.nickname, "url": url})
+    except QueueFull:
+        raise HTTPException(status_code=429, detail="Too many pending mirror jobs. Please retry later.")
+
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}",
+        "stream_url": f"/api/jobs/{job_id}/stream"
+    })
+
+# Workers publish from threads: one read-apply-save of the manifest at a time.
+_manifest_lock = threading.Lock()
+
+def publish_download(nickname, staged_path, target_path, url, result):
+    """Publishes a staged download through the manifest (hashing, version store, rename). Returns (changed, sha)."""
+    with _manifest_lock:
+        manifest = SyncManifest(Config.MANIFEST_FILE, store=Config.blob_store())
+        changed = manifest.apply(nickname, staged_path, target_path, url, result.report, sha=result.sha256)
+        manifest.save()
+        return changed, manifest.get(nickname)["sha256"]
+
+async def run_mirror_job(job, emit):
+    """Worker handler: downloads one project through the shared browser pool."""
+    nickname = job["payload"]["nickname"]
+    url = job["payload"]["url"]
 
-    # Prepare user data dict for the bot
-    user_data = {
-        "username": request.nickname,
-        "email": request.email,
-        "url": request.project_id if request.project_id.startswith("http") else f"https://www.overleaf.com/project/{request.project_id}"
+    # One budget for the whole job: waiting for a browser, navigation, editor, download.
+    deadline = Deadline(Config.JOB_TIMEOUT)
+    await emit("Waiting for a browser...")
+    target_path = os.path.join(Config.PDF_DIR, f"{nickname}.pdf")
+    staged_path = target_path + ".new"
+    async with app.state.pool.lease(deadline) as bot:
+        result = await bot.download_project(url, staged_path, status_callback=emit, deadline=deadline)
+    if not result:
+        if result.stage:
+            raise RuntimeError(f"Timed out after {Config.JOB_TIMEOUT}s while in stage '{result.stage}'.")
+        raise RuntimeError(f"Failed to mirror CV: {result.error}")
+
+    if bot.postprocess:
+        bot.postprocess.reports.pop(staged_path, None)
+    changed, sha = await asyncio.to_thread(publish_download, nickname, staged_path, target_path, url, result)
+    previews = Config.preview_cache()
+    if changed and previews.available():
+        # Warm the preview cache in the background; requests render lazily anyway.
+        _background.add(asyncio.create_task(warm_previews(target_path, sha)))
+    pdf_filename = f"{nickname}.pdf"
+    return {
+        "status": "success",
+        "url": f"/public/pdfs/{pdf_filename}",
+        "versioned_url": versioned_url(nickname, sha),
+        "preview_url": f"/preview/{nickname}.{previews.formats()[0]}" if previews.available() else None,
+        "filename": pdf_filename,
+        "changed": changed
     }
 
-    async def event_generator():
-        q = asyncio.Queue()
-        
-        async def bot_producer():
-            """Runs the bot and puts status updates into the queue."""
-            try:
-                # Callback that puts messages into queue
-                async def status_callback(msg):
-                    await q.put(json.dumps({"type": "status", "message": msg}) + "\n")
-                
-                await q.put(json.dumps({"type": "status", "message": "Initializing session..."}) + "\n")
-                
-                async with OverleafBot(headless=True, auth_path=Config.AUTH_FILE) as bot:
-                    await q.put(json.dumps({"type": "status", "message": "Authenticating..."}) + "\n")
-                    
-                    if not await bot.login(email=Config.EMAIL, password=Config.PASSWORD, manual=False, status_callback=status_callback):
-                        await q.put(json.dumps({"type": "error", "message": "Bot authentication failed."}) + "\n")
-                        return
-
-                    target_path = os.path.join(Config.PDF_DIR, f"{request.nickname}.pdf")
-                    success = await bot.download_project(user_data["url"], target_path, status_callback=status_callback)
-                    
-                    if success:
-                        pdf_filename = f"{request.nickname}.pdf"
-                        result = {
-                            "status": "success",
-                            "url": f"/public/pdfs/{pdf_filename}",
-                            "filename": pdf_filename
-                        }
-                        await q.put(json.dumps({"type": "result", **result}) + "\n")
-                    else:
-                        await q.put(json.dumps({"type": "error", "message": "Failed to mirror CV."}) + "\n")
-                        
-            except Exception as e:
-                logger.error(f"Error in bot producer: {e}")
-                await q.put(json.dumps({"type": "error", "message": f"Server error: {str(e)}"}) + "\n")
-            finally:
-                # Sentinel to signal end of stream
-                await q.put(None)
-
-        # Start producer as a background task
-        producer_task = asyncio.create_task(bot_producer())
-        
-        try:
-            while True:
-                # Wait for next item
-                item = await q.get()
-                if item is None:
-                    break
-                yield item
-        except asyncio.CancelledError:
-            # If client disconnects, we should try to cancel the producer
-            producer_task.cancel()
-            raise
-
-    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+# Idle SSE streams send a comment this often, so proxies keep the connection open.
+SSE_HEARTBEAT = 15.0
+
+# Fire-and-forget tasks, referenced until done so they are not garbage collected.
+_background = set()
+
+async def warm_previews(pdf_path, sha):
+    try:
+        await asyncio.to_thread(Config.preview_cache().render, pdf_path, sha)
+    except Exception as e:
+        logger.warning("Preview rendering failed for %s: %s", sha[:12], e)
+    finally:
+        _background.discard(asyncio.current_task())
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Returns the current state of a mirror job."""
+    job = await asyncio.to_thread(app.state.jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return {k: job[k] for k in ("id", "status", "message", "result", "created_at", "updated_at")}
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancels a queued or running mirror job, freeing its browser page."""
+    if not await app.state.workers.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job not found or already finished.")
+    return {"id": job_id, "status": "cancelling"}
+
+@app.get("/api/jobs/{job_id}/stream")
+async def job_stream(job_id: str, request: Request, format: str = None,
+                     last_event_id: int = Header(default=0)):
+    """
+    Streams the status updates of a job, ending with the final result: NDJSON by
+    default, Server-Sent Events with `Accept: text/event-stream` or `?format=sse`.
+    Any number of clients can follow one job; a client reconnecting with
+    Last-Event-ID only receives what it missed. Disconnecting does not cancel the job.
+    """
+    job = await asyncio.to_thread(app.state.jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    sse = format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+
+    if sse:
+        async def event_generator():
+            async for event in app.state.workers.stream(job_id, last_event_id, heartbeat=SSE_HEARTBEAT):
+                yield ": keep-alive\n\n" if event is None else event.sse
+        return StreamingResponse(event_generator(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def ndjson_generator():
+        async for event in app.state.workers.stream(job_id, last_event_id):
+            yield event.ndjson
+
+    return StreamingResponse(ndjson_generator(), media_type="application/x-ndjson")
 
 @app.post("/api/delete")
 async def delete_cv(request: DeleteRequest):
     """
     Deletes the CV entry if username and email match.
     """
-    logger.info(f"Received delete request for {request.username}")
+    logger.info("Received delete request for %s", request.username)
     
     try:
-        users = Config.load_users()
-        found = False
-        new_users = []
-        
-        for user in users:
-            if user.get("username") == request.username and user.get("email") == request.email:
-                found = True
-                continue
-            new_users.append(user)
+        found = await asyncio.to_thread(Config.delete_user, request.username, request.email, False)
             
         if found:
-            Config.save_users(new_users)
-            logger.info(f"User {request.username} deleted.")
+            schedule_users_export()
+            logger.info("User %s deleted.", request.username)
             return {"status": "success", "message": "CV entry deleted."}
         else:
             raise HTTPException(status_code=404, detail="User not found or email mismatch.")
@@ -148,9 +252,15 @@ async def delete_cv(request: DeleteRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting user: {e}")
+        logger.error("Error deleting user: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, download counters, in-flight pages and queue depth."""
+    QUEUE_DEPTH.set(await asyncio.to_thread(app.state.jobs.depth))
+    return PlainTextResponse(REGISTRY.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
@@ -0,0 +1,28 @@
+import hashlib
+
+
+def parse_shard(value):
+    """Parses "i/n" (0-based shard i of n) into a tuple."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/n")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}', expected 0 <= i < n")
+    return index, count
+
+
+def shard_of(username, count):
+    """Stable shard of a username (independent of process, machine and Python hash seed)."""
+    digest = hashlib.sha256(username.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def select_shard(users, index, count):
+    return [u for u in users if shard_of(u["username"], count) == index]
+
+
+def split(items, parts):
+    """Splits items round-robin into at most `parts` non-empty lists."""
+    chunks = [items[i::parts] for i in range(parts)]
+    return [c for c in chunks if c]
@@ -0,0 +1,213 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+FIELDS = ("username", "email", "url")
+
+
+def write_users_json(path, users):
+    """Atomically writes the public users.json consumed by the static site."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(users, f, indent=4)
+    os.replace(temp_path, path)
+
+
+class UserStore:
+    """Interface of the user registry."""
+
+    def all(self):
+        raise NotImplementedError
+
+    def get(self, username):
+        raise NotImplementedError
+
+    def find_by_email(self, email):
+        raise NotImplementedError
+
+    def upsert(self, user):
+        """Adds or replaces a user. Returns True if it already existed."""
+        raise NotImplementedError
+
+    def delete(self, username, email=None):
+        """Deletes a user (only if the email matches, when given). Returns True if deleted."""
+        raise NotImplementedError
+
+    def export(self, path):
+        write_users_json(path, self.all())
+
+
+class JsonUserStore(UserStore):
+    """The original whole-file users.json registry."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def all(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def get(self, username):
+        return next((u for u in self.all() if u.get("username") == username), None)
+
+    def find_by_email(self, email):
+        return [u for u in self.all() if u.get("email") == email]
+
+    def upsert(self, user):
+        users = self.all()
+        for i, existing in enumerate(users):
+            if existing["username"] == user["username"]:
+                users[i] = user
+                write_users_json(self.path, users)
+                return True
+        users.append(user)
+        write_users_json(self.path, users)
+        return False
+
+    def delete(self, username, email=None):
+        users = self.all()
+        kept = [u for u in users if not (u["username"] == username and (email is None or u.get("email") == email))]
+        if len(kept) == len(users):
+            return False
+        write_users_json(self.path, kept)
+        return True
+
+    def export(self, path):
+        if os.path.abspath(path) != os.path.abspath(self.path):
+            super().export(path)
+
+
+class SqliteUserStore(UserStore):
+    """
+    SQLite (WAL) registry with indexed lookups and single-statement upserts/deletes.
+    Safe for concurrent writers across threads and processes.
+
+    users.json stays editable (by hand or by the dispatch workflow): when it was
+    modified after the store last exported it, the store is reloaded from it on
+    startup, so the next export does not revert those edits.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            url TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS users_email ON users (email);
+        CREATE TABLE IF NOT EXISTS exports (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path, seed_json=None):
+        """
+        :param seed_json: users.json imported when the database is created, and
+            re-imported whenever it changed since the last export to it.
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+        if seed_json and os.path.exists(seed_json) and self._modified_since_export(seed_json):
+            self.replace_all(JsonUserStore(seed_json).all())
+            self._record_export(seed_json)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")
+            yield conn
+        finally:
+            conn.close()
+
+    def _modified_since_export(self, json_path):
+        with self._connect() as conn:
+            row = conn.execute("SELECT mtime_ns FROM exports WHERE path = ?", (os.path.abspath(json_path),)).fetchone()
+        return row is None or os.stat(json_path).st_mtime_ns > row["mtime_ns"]
+
+    def _record_export(self, json_path):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO exports (path, mtime_ns) VALUES (?, ?) ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns",
+                (os.path.abspath(json_path), os.stat(json_path).st_mtime_ns)
+            )
+
+    def replace_all(self, users):
+        """Makes the registry exactly `users`, in that order, keeping the creation time of existing users."""
+        now = int(time.time())
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                created = dict(conn.execute("SELECT username, created_at FROM users").fetchall())
+                conn.execute("DELETE FROM users")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO users (username, email, url, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    [(u["username"], u["email"], u["url"], created.get(u["username"], now), now) for u in users]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def export(self, path):
+        super().export(path)
+        self._record_export(path)
+
+    @staticmethod
+    def _to_user(row):
+        return {field: row[field] for field in FIELDS}
+
+    def all(self):
+        with self._connect() as conn:
+            # rowid grows with each insert and is kept by upserts: registration order, even within one second.
+            rows = conn.execute("SELECT username, email, url FROM users ORDER BY rowid").fetchall()
+        return [self._to_user(r) for r in rows]
+
+    def get(self, username):
+        with self._connect() as conn:
+            row = conn.execute("SELECT username, email, url FROM users WHERE username = ?", (username,)).fetchone()
+        return self._to_user(row) if row else None
+
+    def find_by_email(self, email):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT username, email, url FROM users WHERE email = ?", (email,)).fetchall()
+        return [self._to_user(r) for r in rows]
+
+    def upsert(self, user):
+        now = int(time.time())
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existed = conn.execute("SELECT 1 FROM users WHERE username = ?", (user["username"],)).fetchone() is not None
+                conn.execute(
+                    """
+                    INSERT INTO users (username, email, url, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (username) DO UPDATE
+                    SET email = excluded.email, url = excluded.url, updated_at = excluded.updated_at
+                    """,
+                    (user["username"], user["email"], user["url"], now, now)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return existed
+
+    def delete(self, username, email=None):
+        with self._connect() as conn:
+            if email is None:
+                cur = conn.execute("DELETE FROM users WHERE username = ?", (username,))
+            else:
+                cur = conn.execute("DELETE FROM users WHERE username = ? AND email = ?", (username, email))
+        return cur.rowcount > 0
@@ -0,0 +1,164 @@
+"""
+Local stand-in for overleaf.com, just enough for OverleafBot and DirectFetcher:
+login, project list, editor page with a delayed "Download PDF" control, join
+interstitial for /read/ links, compile endpoint and generated PDFs.
+"""
+import asyncio
+import socket
+import threading
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
+
+SESSION_COOKIE = "overleaf_session2"
+SESSION_VALUE = "benchmark-session"
+CSRF_TOKEN = "benchmark-csrf"
+
+EDITOR_PAGE = """<!DOCTYPE html>
+<html><head><meta name="ol-csrfToken" content="{csrf}"><title>Project {pid}</title></head>
+<body>
+<div id="editor">Loading editor...</div>
+<script>
+  setTimeout(function () {{
+    var btn = document.createElement("a");
+    btn.setAttribute("aria-label", "Download PDF");
+    btn.setAttribute("href", "/project/{pid}/output/output.pdf?download=1");
+    btn.textContent = "Download PDF";
+    document.getElementById("editor").replaceChildren(btn);
+  }}, {delay});
+</script>
+</body></html>"""
+
+JOIN_PAGE = """<!DOCTYPE html>
+<html><body>
+<button id="join" onclick="window.location.href='/project/{pid}'">OK, join project</button>
+</body></html>"""
+
+
+def make_pdf(size):
+    """A valid single-page PDF padded with a content stream to roughly `size` bytes."""
+    padding = b"0" * max(0, size - 600)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R >>",
+        b"<< /Length " + str(len(padding)).encode() + b" >>\nstream\n" + padding + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def create_app(render_delay=0.5, pdf_size=100_000, compile_delay=0.0):
+    """
+    :param render_delay: Seconds before the editor shows its "Download PDF" control.
+    :param pdf_size: Approximate size of the served PDFs, in bytes.
+    :param compile_delay: Seconds the compile endpoint takes to answer.
+    """
+    app = FastAPI()
+    pdf = make_pdf(pdf_size)
+    # Per-project timeline (first project page request -> PDF served), for latency stats.
+    app.state.timings = {}
+
+    def authenticated(request):
+        return request.cookies.get(SESSION_COOKIE) == SESSION_VALUE
+
+    @app.get("/login", response_class=HTMLResponse)
+    async def login_page():
+        return """<form method="post" action="/login">
+            <input name="email"><input name="password" type="password">
+            <button type="submit">Log in</button></form>"""
+
+    @app.post("/login")
+    async def login():
+        response = RedirectResponse("/project", status_code=302)
+        response.set_cookie(SESSION_COOKIE, SESSION_VALUE)
+        return response
+
+    @app.get("/project")
+    async def project_list(request: Request):
+        if not authenticated(request):
+            return RedirectResponse("/login", status_code=302)
+        return HTMLResponse("<html><body>Projects</body></html>")
+
+    @app.get("/read/{token}")
+    async def read_link(token: str, request: Request):
+        if not authenticated(request):
+            return RedirectResponse("/login", status_code=302)
+        app.state.timings.setdefault(token, {"start": time.perf_counter()})
+        return HTMLResponse(JOIN_PAGE.format(pid=token))
+
+    @app.get("/project/{pid}")
+    async def editor(pid: str, request: Request):
+        if not authenticated(request):
+            return RedirectResponse("/login", status_code=302)
+        app.state.timings.setdefault(pid, {"start": time.perf_counter()})
+        return HTMLResponse(EDITOR_PAGE.format(csrf=CSRF_TOKEN, pid=pid, delay=int(render_delay * 1000)))
+
+    @app.post("/project/{pid}/compile")
+    async def compile_project(pid: str, request: Request):
+        if not authenticated(request) or request.headers.get("x-csrf-token") != CSRF_TOKEN:
+            return JSONResponse({"message": "forbidden"}, status_code=403)
+        if compile_delay:
+            await asyncio.sleep(compile_delay)
+        return {
+            "status": "success",
+            "outputFiles": [{"path": "output.pdf", "url": f"/project/{pid}/output/output.pdf", "type": "pdf"}]
+        }
+
+    @app.get("/project/{pid}/output/output.pdf")
+    async def output_pdf(pid: str, request: Request):
+        if not authenticated(request):
+            return RedirectResponse("/login", status_code=302)
+        timing = app.state.timings.setdefault(pid, {"start": time.perf_counter()})
+        timing["end"] = time.perf_counter()
+        headers = {"Content-Disposition": 'attachment; filename="output.pdf"'}
+        return Response(pdf, media_type="application/pdf", headers=headers)
+
+    return app
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeOverleafServer:
+    """Runs the fake app with uvicorn in a background thread."""
+
+    def __init__(self, app, port=None):
+        self.app = app
+        self.port = port or free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+    def auth_state(self):
+        """A Playwright storage_state holding a valid session for this server."""
+        return {
+            "cookies": [{
+                "name": SESSION_COOKIE, "value": SESSION_VALUE, "domain": "127.0.0.1", "path": "/",
+                "expires": -1, "httpOnly": True, "secure": False, "sameSite": "Lax"
+            }],
+            "origins": []
+        }
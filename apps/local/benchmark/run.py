@@ -0,0 +1,160 @@
+"""
+Offline throughput benchmark of OverleafBot.batch_download_projects against
+the local fake Overleaf (no network needed).
+
+    python main.py bench --projects 10,50 --concurrency 1,3,6 --output bench.json
+"""
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from benchmark.fake_overleaf import FakeOverleafServer, create_app
+from overleaf_bot.core import OverleafBot
+from overleaf_bot.pacing import Pacer
+from backend.logger import setup_logger
+
+logger = setup_logger()
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _process_tree_rss(root_pid):
+    """Total RSS in bytes of a process and all its descendants (Linux /proc)."""
+    parents = {}
+    rss = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        pid = int(entry)
+        parents[pid] = int(fields[1])
+        rss[pid] = int(fields[21]) * PAGE_SIZE
+    total = 0
+    for pid in rss:
+        p = pid
+        while p and p != root_pid:
+            p = parents.get(p)
+        if p == root_pid:
+            total += rss[pid]
+    return total
+
+
+class RssSampler:
+    """Samples the RSS of this process tree (Python + Chromium) in a background thread."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if os.path.isdir("/proc"):
+                self.peak = max(self.peak, _process_tree_rss(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_once(server, auth_path, work_dir, projects, max_concurrent, fetch_mode, read_links):
+    timings = server.app.state.timings
+    timings.clear()
+    batch = []
+    for i in range(projects):
+        pid = f"{projects:08x}{max_concurrent:04x}{i:012x}"
+        url = f"{server.base_url}/read/{pid}" if read_links else f"{server.base_url}/project/{pid}"
+        batch.append((url, os.path.join(work_dir, f"{pid}.pdf")))
+
+    async with OverleafBot(headless=True, auth_path=auth_path, base_url=server.base_url,
+                           fetch_mode=fetch_mode, pacer=Pacer(rate=0)) as bot:
+        if not await bot.login():
+            raise RuntimeError("Could not authenticate against the fake Overleaf server")
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            results = await bot.batch_download_projects(batch, max_concurrent=max_concurrent)
+            elapsed = time.perf_counter() - started
+
+    latencies = sorted(t["end"] - t["start"] for t in timings.values() if "end" in t)
+    succeeded = sum(1 for r in results if r)
+    return {
+        "projects": projects,
+        "max_concurrent": max_concurrent,
+        "fetch_mode": fetch_mode,
+        "succeeded": succeeded,
+        "elapsed": round(elapsed, 3),
+        "projects_per_sec": round(succeeded / elapsed, 3) if elapsed else None,
+        "p50": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95": round(percentile(latencies, 95), 3) if latencies else None,
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1)
+    }
+
+
+def run_benchmark(args):
+    app = create_app(render_delay=args.render_delay, pdf_size=args.pdf_size, compile_delay=args.compile_delay)
+    work_dir = tempfile.mkdtemp(prefix="overlink-bench-")
+    runs = []
+    try:
+        with FakeOverleafServer(app) as server:
+            auth_path = os.path.join(work_dir, "auth.json")
+            with open(auth_path, "w") as f:
+                json.dump(server.auth_state(), f)
+
+            for projects in args.projects:
+                for max_concurrent in args.concurrency:
+                    result = asyncio.run(run_once(
+                        server, auth_path, work_dir, projects, max_concurrent, args.fetch, args.read_links
+                    ))
+                    logger.info("%s projects @ %s: %s projects/s, p50 %ss, p95 %ss, peak RSS %s MB",
+                                projects, max_concurrent, result["projects_per_sec"], result["p50"], result["p95"],
+                                result["peak_rss_mb"])
+                    runs.append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": int(time.time()),
+        "config": {
+            "render_delay": args.render_delay,
+            "pdf_size": args.pdf_size,
+            "compile_delay": args.compile_delay,
+            "fetch_mode": args.fetch,
+            "read_links": args.read_links
+        },
+        "runs": runs
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    logger.info("Benchmark report written to %s", args.output)
+    return report
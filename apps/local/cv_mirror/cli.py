@@ -32,7 +32,7 @@ def run_sync(args):
                 logger.warning("No users found in users.json")
                 return
 
-            logger.info(f"Found {len(users)} users.")
+            logger.info("Found %s users.", len(users))
             success_count = 0
             
             for user in users:
@@ -42,7 +42,7 @@ def run_sync(args):
                 if await bot.download_project(user.get("url"), target_path):
                     success_count += 1
             
-            logger.info(f"Batch complete. {success_count}/{len(users)} successful.")
+            logger.info("Batch complete. %s/%s successful.", success_count, len(users))
             
             if success_count == 0 and len(users) > 0:
                 sys.exit(1)
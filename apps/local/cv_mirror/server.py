@@ -46,15 +46,15 @@ async def mirror_cv(request: MirrorRequest):
     Mirrors the CV from Overleaf Project ID used by the Nickname.
     Returns a stream of status updates ending with the final result.
     """
-    logger.info(f"Received request for {request.nickname} (ID: {request.project_id})")
+    logger.info("Received request for %s (ID: %s)", request.nickname, request.project_id)
     
     # Save/Update user in users.json using Config
     try:
         updated = Config.add_user(request.nickname, request.email, request.project_id)
         action = "Updated" if updated else "Added"
-        logger.info(f"{action} user: {request.nickname}")
+        logger.info("%s user: %s", action, request.nickname)
     except Exception as e:
-        logger.error(f"Error saving user data: {e}")
+        logger.error("Error saving user data: %s", e)
 
     # Prepare user data dict for the bot
     user_data = {
@@ -97,7 +97,7 @@ async def mirror_cv(request: MirrorRequest):
                         await q.put(json.dumps({"type": "error", "message": "Failed to mirror CV."}) + "\n")
                         
             except Exception as e:
-                logger.error(f"Error in bot producer: {e}")
+                logger.error("Error in bot producer: %s", e)
                 await q.put(json.dumps({"type": "error", "message": f"Server error: {str(e)}"}) + "\n")
             finally:
                 # Sentinel to signal end of stream
@@ -125,7 +125,7 @@ async def delete_cv(request: DeleteRequest):
     """
     Deletes the CV entry if username and email match.
     """
-    logger.info(f"Received delete request for {request.username}")
+    logger.info("Received delete request for %s", request.username)
     
     try:
         users = Config.load_users()
@@ -140,7 +140,7 @@ async def delete_cv(request: DeleteRequest):
             
         if found:
             Config.save_users(new_users)
-            logger.info(f"User {request.username} deleted.")
+            logger.info("User %s deleted.", request.username)
             return {"status": "success", "message": "CV entry deleted."}
         else:
             raise HTTPException(status_code=404, detail="User not found or email mismatch.")
@@ -148,7 +148,7 @@ async def delete_cv(request: DeleteRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting user: {e}")
+        logger.error("Error deleting user: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Same import layout as main.py: the backend package plus the shared bot package.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../overlink")))
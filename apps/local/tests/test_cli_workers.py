@@ -0,0 +1,57 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from backend import cli
+
+
+class ThreadPool(ThreadPoolExecutor):
+    """Stands in for the process pool so the patched worker runs in this process."""
+
+    def __init__(self, max_workers=None, mp_context=None):
+        super().__init__(max_workers=max_workers)
+
+
+@pytest.fixture
+def options():
+    return {"concurrency": {"initial": 1, "floor": 1, "ceiling": 1}}
+
+
+def test_failing_worker_reports_transient_failures(monkeypatch, options):
+    async def crash(users, options, limiter):
+        raise RuntimeError("browser crashed")
+
+    monkeypatch.setattr(cli, "ProcessPoolExecutor", ThreadPool)
+    monkeypatch.setattr(cli, "_download_in_worker", crash)
+    users = [{"username": "a"}, {"username": "b"}, {"username": "c"}]
+
+    downloads, reports = asyncio.run(cli.download_with_workers(users, 2, options))
+
+    assert len(downloads) == 3 and len(reports) == 2
+    failures = {u["username"]: ok.kind for u, (ok, _) in zip(users, downloads) if not ok}
+    assert failures == {"a": "transient", "b": "transient", "c": "transient"}
+    assert all(ok.error == "browser crashed" for ok, _ in downloads)
+
+
+def test_worker_login_failure_is_a_transient_failure(monkeypatch, options):
+    class Bot:
+        def __init__(self, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def login(self, **kwargs):
+            return False
+
+    monkeypatch.setattr(cli, "OverleafBot", Bot)
+    monkeypatch.setattr(cli, "build_pipeline", lambda optimize: None)
+    worker_options = dict(options, optimize=False, bot={}, pacer={"rate": 0})
+
+    downloads, _, _ = cli.download_worker([{"username": "a"}], worker_options)
+
+    ok, report = downloads[0]
+    assert not ok and ok.kind == "transient" and ok.error == "worker login failed"
+    assert report is None
@@ -0,0 +1,31 @@
+from overleaf_bot.concurrency import AdaptiveLimiter
+
+
+def test_baseline_follows_lasting_latency_changes():
+    limiter = AdaptiveLimiter(initial=4, floor=1, ceiling=8)
+    limiter.record(1, 0.1, True, "http")
+    # One fast outlier, then the network settles at 1s per download.
+    for ticket in range(2, 60):
+        limiter.record(ticket, 1.0, True, "http")
+    decreases = limiter.decreases
+    for ticket in range(60, 80):
+        limiter.record(ticket, 1.0, True, "http")
+    assert limiter.decreases == decreases
+    assert 0.9 < limiter.baselines["http"] <= 1.0
+
+
+def test_paths_have_separate_baselines():
+    limiter = AdaptiveLimiter(initial=4, floor=1, ceiling=8)
+    limiter.record(1, 0.2, True, "http")
+    limiter.record(2, 5.0, True, "browser")
+    assert limiter.decreases == 0
+    assert limiter.baselines == {"http": 0.2, "browser": 5.0}
+
+
+def test_no_decrease_at_the_floor():
+    limiter = AdaptiveLimiter(initial=2, floor=1, ceiling=8)
+    limiter.record(1, 1.0, False)
+    assert limiter.limit == 1 and limiter.decreases == 1
+    limiter._started = 10
+    limiter.record(10, 1.0, False)
+    assert limiter.limit == 1 and limiter.decreases == 1
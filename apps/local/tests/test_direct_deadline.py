@@ -0,0 +1,46 @@
+import asyncio
+import time
+from overleaf_bot.core import OverleafBot
+from overleaf_bot.deadline import Deadline
+from overleaf_bot.pdfstream import DownloadResult
+from overleaf_bot.postprocess import Pipeline, Stage
+
+PDF = b"%PDF-1.5\n" + b"x" * 100 + b"\n%%EOF\n"
+
+
+class SlowShrink(Stage):
+    name = "slow"
+
+    def process(self, src, dst):
+        time.sleep(0.3)
+        with open(src, "rb") as f, open(dst, "wb") as out:
+            out.write(f.read()[:-10] + b"\n%%EOF\n")
+
+
+class FakeFetcher:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    async def fetch(self, pid, temp_path, output_path):
+        await asyncio.sleep(self.delay)
+        with open(temp_path, "wb") as f:
+            f.write(PDF)
+        return DownloadResult(output_path, "0" * 64, len(PDF), "http")
+
+
+def direct_download(tmp_path, fetcher, seconds):
+    bot = OverleafBot(fetch_mode="http", fetcher=fetcher, postprocess=Pipeline([SlowShrink()]))
+    output = str(tmp_path / "cv.pdf")
+    return asyncio.run(bot._try_direct_download("0123456789abcdef01234567", output, deadline=Deadline(seconds)))
+
+
+def test_post_processing_is_not_cut_by_the_deadline(tmp_path):
+    result = direct_download(tmp_path, FakeFetcher(), seconds=0.1)
+    assert result and result.report["stages"] == ["slow"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cv.pdf"]
+
+
+def test_deadline_during_the_fetch_leaves_no_files(tmp_path):
+    result = direct_download(tmp_path, FakeFetcher(delay=1.0), seconds=0.1)
+    assert not result and result.stage == "http_fetch"
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,47 @@
+import asyncio
+from backend.events import EventBus
+
+
+def collect(bus, topic, last_event_id=0):
+    async def run():
+        return [(e.id, e.type) async for e in bus.subscribe(topic, last_event_id)]
+    return run()
+
+
+def test_replays_after_last_event_id_then_follows_live_events():
+    async def run():
+        bus = EventBus(replay=10, linger=60)
+        bus.open("job")
+        for n in range(3):
+            bus.publish("job", "status", message=f"step {n}")
+        follower = asyncio.create_task(collect(bus, "job", last_event_id=2))
+        await asyncio.sleep(0)
+        bus.publish("job", "result", status="success")
+        late = await collect(bus, "job", last_event_id=0)
+        return await follower, late
+
+    follower, late = asyncio.run(run())
+    assert follower == [(3, "status"), (4, "result")]
+    # A finished topic stays replayable for `linger` seconds.
+    assert late == [(1, "status"), (2, "status"), (3, "status"), (4, "result")]
+
+
+def test_replay_buffer_is_bounded():
+    async def run():
+        bus = EventBus(replay=2)
+        channel = bus.open("job")
+        for n in range(5):
+            bus.publish("job", "status", message=str(n))
+        return [e.id for e in channel.since(0)]
+
+    assert asyncio.run(run()) == [4, 5]
+
+
+def test_event_formats_are_serialized_once():
+    async def run():
+        bus = EventBus()
+        return bus.publish("job", "status", message="hi")
+
+    event = asyncio.run(run())
+    assert event.ndjson == '{"id": 1, "type": "status", "message": "hi"}\n'
+    assert event.sse == f"id: 1\nevent: status\ndata: {event.json}\n\n"
@@ -0,0 +1,63 @@
+import asyncio
+import httpx
+import pytest
+from overleaf_bot.fetch import DirectFetcher, DirectFetchError
+from overleaf_bot.pacing import Pacer
+
+PDF = b"%PDF-1.5\n" + b"x" * 100 + b"\n%%EOF\n"
+PROJECT_PAGE = '<html><meta name="ol-csrfToken" content="token"></html>'
+
+
+def stand_in(compile_response):
+    """A local stand-in for the Overleaf endpoints the direct path uses."""
+
+    def handler(request):
+        if request.method == "GET" and request.url.path == "/project/p1":
+            return httpx.Response(200, text=PROJECT_PAGE)
+        if request.method == "POST" and request.url.path == "/project/p1/compile":
+            assert request.headers["X-CSRF-Token"] == "token"
+            return compile_response
+        if request.url.path == "/build/output.pdf":
+            return httpx.Response(200, content=PDF)
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def download(tmp_path, compile_response):
+    async def run():
+        fetcher = DirectFetcher(base_url="https://overleaf.test", auth_path=None, pacer=Pacer(rate=0))
+        fetcher.client = httpx.AsyncClient(base_url=fetcher.base_url, transport=stand_in(compile_response))
+        try:
+            return await fetcher.download("p1", str(tmp_path / "cv.pdf"))
+        finally:
+            await fetcher.stop()
+    return asyncio.run(run())
+
+
+def test_downloads_the_compiled_pdf(tmp_path):
+    compiled = httpx.Response(200, json={"status": "success",
+                                         "outputFiles": [{"path": "output.pdf", "url": "/build/output.pdf"}]})
+    result = download(tmp_path, compiled)
+    assert result.source == "http" and result.size == len(PDF)
+    assert (tmp_path / "cv.pdf").read_bytes() == PDF
+    assert not (tmp_path / "cv.pdf.tmp").exists()
+
+
+def test_non_json_compile_response_is_a_fetch_error(tmp_path):
+    login_page = httpx.Response(200, text="<html>Log in to Overleaf</html>", headers={"content-type": "text/html"})
+    with pytest.raises(DirectFetchError, match="no JSON"):
+        download(tmp_path, login_page)
+    assert not (tmp_path / "cv.pdf").exists()
+
+
+def test_missing_output_url_is_a_fetch_error(tmp_path):
+    compiled = httpx.Response(200, json={"status": "success", "outputFiles": [{"path": "output.pdf"}]})
+    with pytest.raises(DirectFetchError, match="no output.pdf"):
+        download(tmp_path, compiled)
+
+
+def test_client_error_keeps_its_status(tmp_path):
+    with pytest.raises(DirectFetchError) as error:
+        download(tmp_path, httpx.Response(403))
+    assert error.value.status == 403
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from backend.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, QueueFull, WorkerPool
+
+
+def test_depth_limit_counts_unfinished_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_depth=2)
+    first = queue.enqueue("mirror", {"n": 1})
+    queue.enqueue("mirror", {"n": 2})
+    with pytest.raises(QueueFull):
+        queue.enqueue("mirror", {"n": 3})
+
+    # A finished job frees its place.
+    queue.update(first, status=SUCCEEDED)
+    queue.enqueue("mirror", {"n": 3})
+    assert queue.depth() == 2
+
+
+def test_claims_in_order_and_requeues_interrupted_jobs(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(path)
+    ids = [queue.enqueue("mirror", {"n": n}) for n in range(2)]
+    claimed = queue.claim()
+    assert claimed["id"] == ids[0] and claimed["payload"] == {"n": 0}
+
+    # The process dies with the job running; the next one puts it back first in line.
+    restarted = JobQueue(path)
+    assert restarted.get(ids[0])["status"] == RUNNING
+    assert restarted.requeue_running() == 1
+    again = restarted.claim()
+    assert again["id"] == ids[0] and again["attempts"] == 2
+    assert restarted.get(ids[1])["status"] == QUEUED
+
+
+def test_workers_run_jobs_and_replay_their_events(tmp_path):
+    async def handler(job, emit):
+        await emit("working")
+        return {"status": "success", "n": job["payload"]["n"]}
+
+    async def run():
+        queue = JobQueue(str(tmp_path / "jobs.db"))
+        workers = WorkerPool(queue, handler, size=1, poll_interval=0.05)
+        await workers.start()
+        try:
+            job_id = await workers.submit("mirror", {"n": 7})
+            events = [e async for e in workers.stream(job_id)]
+            # A client reconnecting with Last-Event-ID 1 only gets what it missed.
+            replayed = [e async for e in workers.stream(job_id, last_event_id=1)]
+        finally:
+            await workers.stop()
+        return queue.get(job_id), events, replayed
+
+    job, events, replayed = asyncio.run(run())
+    assert job["status"] == SUCCEEDED and job["result"]["n"] == 7
+    assert [e.type for e in events] == ["status", "result"]
+    assert [(e.id, e.type) for e in replayed] == [(2, "result")]
+
+
+def test_cancelling_a_queued_job_fails_it(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("mirror", {})
+    assert queue.cancel_queued(job_id)
+    assert queue.get(job_id)["status"] == FAILED
+    assert not queue.cancel_queued(job_id)
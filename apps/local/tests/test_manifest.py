@@ -0,0 +1,46 @@
+import os
+from backend.blobs import BlobStore
+from backend.manifest import SyncManifest, file_sha256
+
+PDF = b"%PDF-1.5\ncv\n%%EOF\n"
+
+
+def stage(tmp_path, name, content):
+    path = tmp_path / "pdfs" / f"{name}.pdf.new"
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_identical_download_is_not_republished(tmp_path):
+    manifest = SyncManifest(str(tmp_path / "sync_manifest.json"))
+    target = str(tmp_path / "pdfs" / "ada.pdf")
+    assert manifest.apply("ada", stage(tmp_path, "ada", PDF), target, "https://example.com/ada")
+    mtime = os.stat(target).st_mtime_ns
+    manifest.save()
+
+    reloaded = SyncManifest(str(tmp_path / "sync_manifest.json"))
+    staged = stage(tmp_path, "ada", PDF)
+    assert not reloaded.apply("ada", staged, target, "https://example.com/ada")
+    assert not os.path.exists(staged) and os.stat(target).st_mtime_ns == mtime
+    assert reloaded.get("ada")["sha256"] == file_sha256(target)
+
+
+def test_blob_store_keeps_one_copy_per_content(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    manifest = SyncManifest(str(tmp_path / "sync_manifest.json"), store=store)
+    pdfs = tmp_path / "pdfs"
+    for name in ("ada", "bob"):
+        manifest.apply(name, stage(tmp_path, name, PDF), str(pdfs / f"{name}.pdf"), None)
+    manifest.apply("ada", stage(tmp_path, "ada", PDF + b"v2"), str(pdfs / "ada.pdf"), None)
+    manifest.save()
+
+    blobs = [f for _, _, files in os.walk(store.objects_dir) for f in files]
+    assert len(blobs) == 2
+    assert [v["sha256"] for v in store.versions["ada"]] == [file_sha256(pdfs / "bob.pdf"), file_sha256(pdfs / "ada.pdf")]
+    assert (pdfs / "bob.pdf").read_bytes() == PDF
+
+    # A fresh checkout without the published files gets them back from the store.
+    os.remove(pdfs / "ada.pdf")
+    assert BlobStore(store.root).restore(str(pdfs)) == 1
+    assert (pdfs / "ada.pdf").read_bytes() == PDF + b"v2"
@@ -0,0 +1,74 @@
+import asyncio
+from overleaf_bot import memory
+from overleaf_bot.core import OverleafBot
+from overleaf_bot.memory import MemoryWatchdog
+
+MB = 1024 * 1024
+
+
+def fake_rss(monkeypatch, values):
+    samples = iter(values)
+    monkeypatch.setattr(memory, "sample_browser_memory", lambda: {"total": next(samples) * MB})
+
+
+def test_memory_recycles_need_growth_since_the_last_recycle(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(memory.time, "monotonic", lambda: clock[0])
+    # Over the limit; after the recycle the shared browser alone still is (1100 MB).
+    fake_rss(monkeypatch, [1200, 1100, 1150, 1250])
+    watchdog = MemoryWatchdog(max_rss=1000 * MB, interval=0, min_interval=60)
+
+    assert watchdog.check() == "memory"
+    watchdog.reset()
+    assert watchdog.baseline == 1100 * MB
+    assert watchdog.check() is None          # within min_interval: not even sampled
+    clock[0] = 61
+    assert watchdog.check() is None          # 1150: grew by less than min_growth (100 MB)
+    assert watchdog.check() == "memory"      # 1250: this context grew again
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def new_page(self):
+        return FakePage(self)
+
+    async def storage_state(self, path=None):
+        return {"cookies": [], "origins": []}
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    async def new_context(self, **kwargs):
+        return FakeContext()
+
+
+def test_traced_pages_count_as_pages_of_the_bot():
+    async def run():
+        context = FakeContext()
+        bot = OverleafBot.from_context(context, await context.new_page(), watchdog=MemoryWatchdog(max_jobs=2))
+        bot.browser = FakeBrowser()
+
+        page = await bot._open_page(own_context=True)
+        assert page.context is not context and bot._active_pages == 1
+        await bot._close_page(page)
+        assert page.context.closed and not context.closed
+        assert bot._active_pages == 0 and bot.watchdog.jobs == 1
+
+        # The job count still reaches the recycle limit through traced jobs.
+        await bot._close_page(await bot._open_page(own_context=True))
+        assert context.closed and bot.context is not context and bot.watchdog.jobs == 0
+
+    asyncio.run(run())
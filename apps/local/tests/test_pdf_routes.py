@@ -0,0 +1,19 @@
+import asyncio
+import os
+from backend import pdf_routes
+from backend.config import Config
+
+
+def test_hash_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PDF_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "MANIFEST_FILE", str(tmp_path / "missing_manifest.json"))
+    monkeypatch.setattr(pdf_routes, "HASH_CACHE_SIZE", 2)
+    monkeypatch.setattr(pdf_routes, "_hash_cache", pdf_routes.OrderedDict())
+    monkeypatch.setattr(pdf_routes, "_manifest_cache", {"mtime": None, "manifest": None})
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.pdf").write_bytes(b"%PDF-" + name.encode())
+
+    versions = [asyncio.run(pdf_routes.current_version(name)) for name in ("a", "b", "c")]
+
+    assert len({sha for _, sha, _ in versions}) == 3
+    assert [os.path.basename(path) for path, _, _ in pdf_routes._hash_cache] == ["b.pdf", "c.pdf"]
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from overleaf_bot.pool import BrowserPool
+
+
+class FakePage:
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    async def new_page(self):
+        return FakePage()
+
+    async def storage_state(self, path=None):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FlakyBrowser:
+    """Fails to create the next `failures` contexts."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.created = 0
+
+    async def new_context(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("browser is busy")
+        self.created += 1
+        return FakeContext()
+
+
+def test_failed_recycle_is_retried_on_the_next_lease():
+    async def run():
+        pool = BrowserPool(size=1, auth_path=None, max_uses=1)
+        pool.browser = FlakyBrowser()
+        pool._idle.put_nowait(await pool._new_context())
+
+        pool.browser.failures = 2
+        # Worn out after one use; replacing it fails and leaves an empty slot.
+        async with pool.lease():
+            pass
+        assert pool._idle.qsize() == 1 and not pool._contexts
+        # The next lease fails to create it again, but the slot survives that too.
+        with pytest.raises(RuntimeError):
+            async with pool.lease():
+                pass
+        assert pool._idle.qsize() == 1
+        async with pool.lease() as bot:
+            assert bot.context in pool._contexts
+        assert pool._idle.qsize() == 1
+
+    asyncio.run(asyncio.wait_for(run(), 5))
@@ -0,0 +1,26 @@
+import asyncio
+from overleaf_bot.postprocess import Pipeline, Stage
+
+
+class Rewrite(Stage):
+    def __init__(self, name, content):
+        self.name = name
+        self.content = content
+
+    def process(self, src, dst):
+        with open(dst, "wb") as f:
+            f.write(self.content)
+
+
+def test_only_smaller_outputs_replace_the_pdf(tmp_path):
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(b"x" * 100)
+    pipeline = Pipeline([Rewrite("bigger", b"y" * 150), Rewrite("smaller", b"z" * 60), Rewrite("same", b"w" * 60)])
+
+    report = asyncio.run(pipeline.run(str(path), key="cv"))
+
+    assert path.read_bytes() == b"z" * 60
+    assert report["stages"] == ["smaller"]
+    assert report["discarded"] == ["bigger", "same"]
+    assert (report["before"], report["after"]) == (100, 60)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cv.pdf"]
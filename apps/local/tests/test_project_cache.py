@@ -0,0 +1,32 @@
+import multiprocessing
+from overleaf_bot.project_cache import ProjectCache
+
+ID = "0123456789abcdef01234567"
+
+
+def record_many(path, worker, count):
+    for i in range(count):
+        cache = ProjectCache(path)
+        cache.record(f"w{worker}-{i}", editor_ready=1.0)
+        cache.save()
+
+
+def test_concurrent_saves_keep_every_entry(tmp_path):
+    path = str(tmp_path / "project_cache.json")
+    workers = [multiprocessing.Process(target=record_many, args=(path, w, 25)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(ProjectCache(path).entries) == 100
+
+
+def test_stale_only_when_the_editor_lands_elsewhere(tmp_path):
+    cache = ProjectCache(str(tmp_path / "project_cache.json"))
+    cache.record("https://www.overleaf.com/read/token", page_url=f"https://www.overleaf.com/project/{ID}")
+    key = "https://www.overleaf.com/read/token"
+    assert not cache.stale(key, f"https://www.overleaf.com/project/{ID}")
+    assert not cache.stale(key, "https://www.overleaf.com/login")
+    assert cache.stale(key, "https://www.overleaf.com/project/fedcba9876543210fedcba98")
+    assert cache.stale(key, "https://www.overleaf.com/read/token")
+    assert not cache.stale("unknown", "https://www.overleaf.com/project")
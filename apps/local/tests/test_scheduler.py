@@ -0,0 +1,53 @@
+from backend.scheduler import SyncSchedule
+
+HOUR = 3600
+
+
+def schedule(tmp_path):
+    return SyncSchedule(str(tmp_path / "sync_schedule.json"), min_interval=HOUR, max_interval=8 * HOUR)
+
+
+def test_unchanged_checks_back_off_up_to_the_maximum(tmp_path):
+    s = schedule(tmp_path)
+    intervals = []
+    for check in range(5):
+        s.record("ada", changed=False, now=0)
+        intervals.append(s.entries["ada"]["interval"])
+    assert intervals == [2 * HOUR, 4 * HOUR, 8 * HOUR, 8 * HOUR, 8 * HOUR]
+
+
+def test_frequent_changes_poll_at_half_the_typical_gap(tmp_path):
+    s = schedule(tmp_path)
+    for day in range(4):
+        s.record("ada", changed=True, now=day * 4 * HOUR)
+    assert s.entries["ada"]["interval"] == 2 * HOUR
+    assert s.next_due("ada") == 12 * HOUR + 2 * HOUR
+
+
+def test_failures_retry_without_touching_history(tmp_path):
+    s = schedule(tmp_path)
+    s.record("ada", changed=False, now=0)
+    s.record_failure("ada", now=100)
+    assert s.entries["ada"]["interval"] == 2 * HOUR
+    assert s.next_due("ada") == 100 + HOUR
+
+
+def test_due_orders_by_overdue_and_respects_limit(tmp_path):
+    s = schedule(tmp_path)
+    users = [{"username": name} for name in ("new", "late", "later", "fresh")]
+    s.entries = {"late": {"next_due": 50}, "later": {"next_due": 10}, "fresh": {"next_due": 1000}}
+    assert [u["username"] for u in s.due(users, now=100)] == ["new", "later", "late"]
+    assert [u["username"] for u in s.due(users, now=100, limit=2)] == ["new", "later"]
+
+
+def test_missing_pdf_makes_a_project_due(tmp_path):
+    s = schedule(tmp_path)
+    users = [{"username": "ada"}, {"username": "bob"}]
+    s.record("ada", changed=False, now=0)
+    s.record("bob", changed=False, now=0)
+    s.save()
+
+    reloaded = schedule(tmp_path)
+    assert reloaded.due(users, now=10) == []
+    assert reloaded.due(users, now=10, missing=lambda u: u["username"] == "bob") == [{"username": "bob"}]
+    assert reloaded.earliest_due(users, missing=lambda u: u["username"] == "bob") == 0
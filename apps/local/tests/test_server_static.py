@@ -0,0 +1,19 @@
+import json
+import os
+from fastapi.testclient import TestClient
+
+
+def test_only_published_files_are_public(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from backend.server import app
+    os.makedirs("public/blobs/ab", exist_ok=True)
+    with open("public/users.json", "w") as f:
+        json.dump([{"username": "ada"}], f)
+    for path in ("public/blobs/ab/abcd", "public/sync_manifest.json", "public/sync_schedule.json"):
+        with open(path, "w") as f:
+            f.write("{}")
+
+    client = TestClient(app)
+    assert client.get("/public/users.json").json() == [{"username": "ada"}]
+    for path in ("/public/blobs/ab/abcd", "/public/sync_manifest.json", "/public/sync_schedule.json"):
+        assert client.get(path).status_code == 404
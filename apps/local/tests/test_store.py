@@ -0,0 +1,38 @@
+import os
+from backend.store import JsonUserStore, SqliteUserStore, write_users_json
+
+
+def test_seeded_users_keep_registration_order(tmp_path):
+    users = [{"username": name, "email": f"{name}@example.com", "url": f"https://example.com/{name}"}
+             for name in ("zoe", "adam", "mia")]
+    seed = str(tmp_path / "users.json")
+    write_users_json(seed, users)
+
+    store = SqliteUserStore(str(tmp_path / "users.db"), seed_json=seed)
+    store.upsert({**users[0], "url": "https://example.com/zoe2"})
+    store.upsert({"username": "bob", "email": "bob@example.com", "url": "https://example.com/bob"})
+
+    assert [u["username"] for u in store.all()] == ["zoe", "adam", "mia", "bob"]
+
+
+def test_edits_to_users_json_survive_a_restart(tmp_path):
+    users_json, db = str(tmp_path / "users.json"), str(tmp_path / "users.db")
+    ada = {"username": "ada", "email": "ada@example.com", "url": "https://example.com/ada"}
+    bob = {"username": "bob", "email": "bob@example.com", "url": "https://example.com/bob"}
+    write_users_json(users_json, [ada])
+    store = SqliteUserStore(db, seed_json=users_json)
+    store.export(users_json)
+
+    # Restarting without touching users.json keeps the database as it is.
+    store.upsert(bob)
+    assert [u["username"] for u in SqliteUserStore(db, seed_json=users_json).all()] == ["ada", "bob"]
+
+    # users.json edited after the last export (e.g. by the dispatch workflow): it wins.
+    store.export(users_json)
+    carol = {"username": "carol", "email": "carol@example.com", "url": "https://example.com/carol"}
+    write_users_json(users_json, [carol, ada])
+    os.utime(users_json, ns=(os.stat(users_json).st_atime_ns, os.stat(users_json).st_mtime_ns + 1_000_000))
+    store = SqliteUserStore(db, seed_json=users_json)
+    assert [u["username"] for u in store.all()] == ["carol", "ada"]
+    store.export(users_json)
+    assert [u["username"] for u in JsonUserStore(users_json).all()] == ["carol", "ada"]
@@ -1,4 +1,7 @@
 from .core import OverleafBot
+from .pool import BrowserPool
+from .concurrency import AdaptiveLimiter
+from .memory import MemoryWatchdog
 from .logger import setup_logger
 
 logger = setup_logger()
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from .metrics import CONCURRENCY_LIMIT
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for project downloads.
+
+    Each fast success raises the limit additively (about +1 per `limit`
+    successes); a failed download (error or timeout), or a latency above `latency_tolerance` times the
+    baseline, halves it. The limit always stays within [floor, ceiling].
+    Only one decrease is applied per batch of in-flight work, so a burst of
+    failures caused by one overload does not collapse the limit to the floor.
+
+    The baseline is a moving average of successful latencies (weight `baseline_weight`
+    for each new one), kept per retrieval path ("http", "browser"): it follows lasting
+    changes in the network instead of holding on to one lucky fast download.
+
+        ok = await limiter.run(lambda: download(project))
+    """
+
+    def __init__(self, initial=3, floor=1, ceiling=8, backoff=0.5, latency_tolerance=2.5, baseline_weight=0.1):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = float(min(self.ceiling, max(self.floor, initial)))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.baseline_weight = baseline_weight
+        self.in_flight = 0
+        self.baselines = {}
+        self.peak_limit = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self._started = 0
+        self._recovery_mark = 0
+        self._history = []
+        self._condition = asyncio.Condition()
+
+    @classmethod
+    def static(cls, limit):
+        """A fixed limit (floor == ceiling)."""
+        return cls(initial=limit, floor=limit, ceiling=limit)
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self._started += 1
+            return self._started
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _decrease(self, ticket):
+        # Ignore signals from work started before the previous decrease.
+        if ticket <= self._recovery_mark or self.limit <= self.floor:
+            return
+        self.limit = max(self.floor, self.limit * self.backoff)
+        self.decreases += 1
+        self._recovery_mark = self._started
+
+    def record(self, ticket, latency, ok, path=None):
+        """
+        Feeds one finished download back into the limit.
+        :param path: How the download was retrieved; latencies are compared per path
+        """
+        if not ok:
+            self._decrease(ticket)
+        else:
+            baseline = self.baselines.get(path, latency)
+            self.baselines[path] = baseline + self.baseline_weight * (latency - baseline)
+            if latency > baseline * self.latency_tolerance:
+                self._decrease(ticket)
+            elif self.limit < self.ceiling:
+                self.limit = min(self.ceiling, self.limit + 1 / self.limit)
+                self.increases += 1
+                self.peak_limit = max(self.peak_limit, self.limit)
+        self._history.append(self.limit)
+        CONCURRENCY_LIMIT.set(round(self.limit, 2))
+
+    async def run(self, coro_fn):
+        """Runs `await coro_fn()` under the limit; its truthiness is the success signal."""
+        ticket = await self.acquire()
+        started = time.perf_counter()
+        ok = False
+        try:
+            ok = await coro_fn()
+            return ok
+        finally:
+            # Permanent failures (no access, deleted project) say nothing about load.
+            if ok or getattr(ok, "transient", True):
+                self.record(ticket, time.perf_counter() - started, bool(ok), getattr(ok, "source", None))
+            await self.release()
+
+    @property
+    def settled(self):
+        """The limit the run converged to: the average over the last quarter of the run."""
+        if not self._history:
+            return int(self.limit)
+        tail = self._history[-max(1, len(self._history) // 4):]
+        return round(sum(tail) / len(tail), 2)
+
+    def report(self):
+        return {
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "final": round(self.limit, 2),
+            "settled": self.settled,
+            "peak": round(self.peak_limit, 2),
+            "increases": self.increases,
+            "decreases": self.decreases
+        }
@@ -1,19 +1,112 @@
 import asyncio
-import random
 import os
+import time
+from contextlib import contextmanager
 from playwright.async_api import async_playwright
-from .logger import setup_logger
+from .concurrency import AdaptiveLimiter
+from .deadline import Deadline, DeadlineExceeded
+from .fetch import DirectFetcher, DirectFetchError
+from .pacing import default_pacer
+from .pdfstream import MAX_PDF_SIZE, DownloadResult, InvalidPDF, ingest_file
+from .retry import PERMANENT, PERMANENT_STATUSES, DownloadFailure, ProjectUnavailable, backoff_delay
+from .session import SessionManager
+from .metrics import CONTEXT_RECYCLES, DOWNLOADS, PAGES_IN_FLIGHT, stage
+from .tracing import current_trace
+from .logger import log_context, setup_logger
 
 logger = setup_logger()
 
+BASE_URL = os.getenv("OVERLEAF_BASE_URL", "https://www.overleaf.com")
+FETCH_MODES = ("auto", "http", "browser")
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+
+
+def project_label(project_id):
+    """Short project identifier for logs: the ID or share token, not the whole URL."""
+    return project_id.rstrip("/").split("/")[-1]
+
+
+def context_args(auth_path=None, headless=True):
+    """Builds the keyword arguments shared by every browser context we create."""
+    args = {
+        "user_agent": USER_AGENT,
+        "locale": "en-US"
+    }
+    if auth_path and os.path.exists(auth_path) and headless:
+        logger.info("Loading session from %s...", auth_path)
+        args["storage_state"] = auth_path
+    return args
+
+
+async def close_page(page, timeout=10):
+    """
+    Closes a page, also from a `finally` of a cancelled task, without hanging on a stuck renderer.
+    Returns False if the page could not be closed (its context should then be discarded).
+    """
+    try:
+        await asyncio.wait_for(page.close(), timeout)
+        return True
+    except Exception as e:
+        logger.warning("Failed to close page: %s", e)
+        return False
+
+
 class OverleafBot:
-    def __init__(self, headless=True, auth_path="auth.json"):
+    def __init__(self, headless=True, auth_path="auth.json", base_url=BASE_URL, fetch_mode="browser", fetcher=None, pacer=None, session=None, postprocess=None,
+                 downloads_path=None, max_pdf_size=MAX_PDF_SIZE, project_cache=None, watchdog=None, tracer=None):
+        """
+        :param fetch_mode: "browser" drives the editor UI, "http" only uses the
+            direct HTTP fast path, "auto" tries HTTP first and falls back to the browser.
+        :param fetcher: Optional shared DirectFetcher (otherwise created on demand).
+        :param pacer: Per-host rate limiter for navigations (defaults to the process-wide one).
+        :param session: Optional shared SessionManager for cheap session validation.
+        :param postprocess: Optional postprocess.Pipeline run on each download before it replaces the output.
+        :param downloads_path: Directory the browser writes downloads to. On the same filesystem as the
+            outputs, a download is moved into place instead of copied.
+        :param max_pdf_size: Larger PDFs are rejected before they replace the output (0 = no limit).
+        :param project_cache: Optional ProjectCache; skips the join step for joined projects and
+            sizes the editor timeout from each project's usual load time.
+        :param watchdog: Optional MemoryWatchdog; the bot's own context is recycled (keeping its
+            cookies) after the watchdog's job count or browser memory limit is reached.
+        :param tracer: Optional Tracer; records a timeline (stages, requests, Playwright trace) of every
+            project and keeps the ones its policy selects (slow or failed).
+        """
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"fetch_mode must be one of {FETCH_MODES}")
         self.headless = headless
         self.auth_path = auth_path
+        self.base_url = base_url.rstrip("/")
+        self.fetch_mode = fetch_mode
+        self.fetcher = fetcher
+        self._owns_fetcher = fetcher is None
+        self.pacer = pacer or default_pacer
+        self.session = session or SessionManager(auth_path, self.base_url)
+        self.postprocess = postprocess
+        self.downloads_path = downloads_path
+        self.max_pdf_size = max_pdf_size
+        self.projects = project_cache
+        self.watchdog = watchdog
+        self.tracer = tracer
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
+        # Pages handed out from self.context; closed while the context is draining for a recycle.
+        self._active_pages = 0
+        self._context_open = asyncio.Event()
+        self._context_open.set()
+        self._recycle_reason = None
+
+    @classmethod
+    def from_context(cls, context, page, auth_path=None, **kwargs):
+        """
+        Wraps an existing context/page (e.g. leased from a BrowserPool).
+        The bot does not own the browser, so it should not be stopped.
+        """
+        bot = cls(headless=True, auth_path=auth_path, **kwargs)
+        bot.context = context
+        bot.page = page
+        return bot
 
     async def __aenter__(self):
         await self.start()
@@ -23,25 +116,25 @@ class OverleafBot:
         await self.stop()
 
     async def start(self):
-        self.playwright = await async_playwright().start()
-        
-        # Use standard launch
-        self.browser = await self.playwright.chromium.launch(headless=self.headless)
-        
-        context_args = {
-            "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-            "locale": "en-US"
-        }
-        
-        if self.auth_path and os.path.exists(self.auth_path) and self.headless:
-            logger.info(f"Loading session from {self.auth_path}...")
-            context_args["storage_state"] = self.auth_path
+        if self.fetch_mode == "http":
+            # The HTTP fast path only needs the saved cookies, not a browser.
+            return
+        with stage("browser_start"):
+            self.playwright = await async_playwright().start()
             
-        self.context = await self.browser.new_context(**context_args)
-        
-        self.page = await self.context.new_page()
+            # Use standard launch
+            if self.downloads_path:
+                os.makedirs(self.downloads_path, exist_ok=True)
+            self.browser = await self.playwright.chromium.launch(headless=self.headless, downloads_path=self.downloads_path)
+            
+            self.context = await self.browser.new_context(**context_args(self.auth_path, self.headless))
+            
+            self.page = await self.context.new_page()
 
     async def stop(self):
+        if self.fetcher and self._owns_fetcher:
+            await self.fetcher.stop()
+            self.fetcher = None
         if self.context:
             try:
                 # Save state on exit if we are running successfully and path is set
@@ -55,8 +148,135 @@ class OverleafBot:
         if self.playwright:
             await self.playwright.stop()
 
-    async def _random_delay(self):
-        await asyncio.sleep(random.uniform(1, 3))
+    async def recycle_context(self, reason="manual"):
+        """
+        Replaces the bot's context and page with fresh ones carrying the same cookies
+        and local storage, releasing the renderer memory the old ones accumulated.
+        Only call while no other page of the context is in use.
+        """
+        if self.browser is None:
+            return
+        with stage("context_recycle"):
+            logger.info("Recycling browser context (%s).", reason)
+            state = await self.context.storage_state()
+            await close_page(self.page)
+            try:
+                await self.context.close()
+            except Exception as e:
+                logger.warning("Failed to close browser context: %s", e)
+            args = context_args(None, self.headless)
+            args["storage_state"] = state
+            self.context = await self.browser.new_context(**args)
+            self.page = await self.context.new_page()
+        CONTEXT_RECYCLES.inc(reason=reason)
+        if self.watchdog:
+            self.watchdog.reset()
+
+    @contextmanager
+    def _trace_job(self, project_id):
+        """Traces one project download when a Tracer is set; yields the JobTrace or None."""
+        if self.tracer is None:
+            yield None
+            return
+        with self.tracer.job(project_label(project_id)) as trace:
+            yield trace
+
+    async def _start_trace(self, trace, context, page):
+        trace.attach(page)
+        if self.tracer.playwright:
+            await trace.start_browser(context)
+
+    async def _stop_trace(self, trace, context, page):
+        trace.detach(page)
+        if self.tracer.playwright:
+            await trace.stop_browser(context)
+
+    async def _download_in_traced_context(self, trace, project_id, output_path, status_callback, deadline):
+        """
+        Runs a traced browser download in a context of its own (with this context's cookies),
+        since a Playwright trace covers a whole context and other projects share ours.
+        """
+        page = await self._open_page(own_context=True)
+        try:
+            await self._start_trace(trace, page.context, page)
+            try:
+                return await self._download_project_with_page(page, project_id, output_path, status_callback, deadline)
+            finally:
+                await self._stop_trace(trace, page.context, page)
+        finally:
+            await self._close_page(page)
+
+    async def _open_page(self, own_context=False):
+        """
+        A new page of the bot's context; waits while the context is draining for a recycle.
+        :param own_context: Opens the page in a new context with this context's cookies instead
+            (closed with the page); it still counts as one of the bot's pages.
+        """
+        await self._context_open.wait()
+        self._active_pages += 1
+        context = None
+        try:
+            if not own_context:
+                return await self.context.new_page()
+            args = context_args(None, self.headless)
+            args["storage_state"] = await self.context.storage_state()
+            context = await self.browser.new_context(**args)
+            return await context.new_page()
+        except BaseException:
+            self._active_pages -= 1
+            if context is not None:
+                await self._close_own_context(context)
+            raise
+
+    @staticmethod
+    async def _close_own_context(context):
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning("Failed to close browser context: %s", e)
+
+    async def _close_page(self, page):
+        """
+        Closes a page from _open_page. Once the watchdog asks for a recycle (or a page
+        cannot be closed), no new pages are opened; the last page to close recycles the context.
+        """
+        own_context = page.context is not self.context
+        closed = await close_page(page)
+        if own_context:
+            # A stuck page of its own context goes away with it; the shared context is not broken.
+            await self._close_own_context(page.context)
+        self._active_pages -= 1
+        if self.watchdog:
+            self.watchdog.record_job()
+        if self._context_open.is_set():
+            reason = "broken" if not (closed or own_context) else (self.watchdog.check() if self.watchdog else None)
+            if reason:
+                self._recycle_reason = reason
+                self._context_open.clear()
+        if not self._context_open.is_set() and self._active_pages == 0:
+            try:
+                await self.recycle_context(self._recycle_reason)
+            except Exception as e:
+                # Later pages fail (and are retried) on their own; the download that just finished stands.
+                logger.error("Failed to recycle browser context: %s", e)
+            finally:
+                self._context_open.set()
+
+    async def _finalize(self, temp_path, output_path, result):
+        """Runs the post-processing pipeline on a finished download, then publishes it atomically."""
+        if self.postprocess:
+            with stage("postprocess"):
+                result.report = await self.postprocess.run(temp_path, key=output_path, sha=result.sha256)
+        with stage("save"):
+            os.replace(temp_path, output_path)
+
+    async def _goto(self, page, url, deadline=None):
+        """Navigates once the per-host rate limiter allows it."""
+        deadline = deadline or Deadline()
+        with deadline.stage("pacing"):
+            await deadline.wait(self.pacer.wait(url))
+        with deadline.stage("navigation"):
+            return await page.goto(url, timeout=deadline.timeout_ms(30))
 
     async def login(self, email=None, password=None, manual=False, status_callback=None):
         if status_callback: await status_callback("Checking authentication status...")
@@ -64,7 +284,7 @@ class OverleafBot:
             logger.info("--- SETUP MODE ---")
             logger.info("Please log in manually in the browser.")
             if status_callback: await status_callback("Manual mode: Please login in the browser window.")
-            await self.page.goto("https://www.overleaf.com/login")
+            await self._goto(self.page, f"{self.base_url}/login")
             
             # Pre-fill
             if email: await self.page.fill('input[name="email"]', email)
@@ -74,24 +294,53 @@ class OverleafBot:
             await asyncio.to_thread(input)
             
             await self.context.storage_state(path=self.auth_path)
-            logger.info(f"Session saved to {self.auth_path}.")
+            self.session.mark_validated()
+            logger.info("Session saved to %s.", self.auth_path)
             if status_callback: await status_callback("Session saved.")
             return True
 
+        with stage("session_check"):
+            return await self._verify_session(email, password, status_callback)
+
+    async def _verify_session(self, email=None, password=None, status_callback=None):
+        # Cheap check: cached validation or one HTTP probe, no page load.
+        # Only meaningful when the browser context was loaded from the same storage_state.
+        if self.fetch_mode == "http" or self.headless:
+            if await self.session.ensure_valid():
+                logger.info("Session valid.")
+                if status_callback: await status_callback("Session valid.")
+                return True
+            if self.fetch_mode == "http":
+                logger.error("Session invalid and no browser available to log in.")
+                if status_callback: await status_callback("Session expired.")
+                return False
+
         # Check existing session
         logger.info("Verifying session...")
         if status_callback: await status_callback("Verifying existing session...")
-        await self.page.goto("https://www.overleaf.com/project")
-        await self._random_delay()
+        await self._goto(self.page, f"{self.base_url}/project")
         
         if "login" in self.page.url:
             logger.warning("Session invalid. Attempting automated login...")
             if status_callback: await status_callback("Session expired. Attempting auto-login...")
             return await self._attempt_auto_login(email, password, status_callback)
         
+        self.session.mark_validated()
         if status_callback: await status_callback("Session valid.")
         return True
 
+    async def refresh_session(self, email=None, password=None):
+        """
+        Reloads the project list in the browser so Overleaf rolls the session
+        cookie, then saves the new storage_state (logging in again if needed).
+        """
+        await self._goto(self.page, f"{self.base_url}/project")
+        if "login" in self.page.url:
+            return await self._attempt_auto_login(email, password)
+        await self.context.storage_state(path=self.auth_path)
+        self.session.mark_validated()
+        return True
+
     async def _attempt_auto_login(self, email, password, status_callback=None):
         if not email or not password:
             logger.error("No credentials for auto-login.")
@@ -100,11 +349,9 @@ class OverleafBot:
             
         try:
             if status_callback: await status_callback("Navigating to login page...")
-            await self.page.goto("https://www.overleaf.com/login")
-            await self._random_delay()
+            await self._goto(self.page, f"{self.base_url}/login")
             if status_callback: await status_callback("Entering credentials...")
             await self.page.fill('input[name="email"]', email)
-            await self._random_delay()
             await self.page.fill('input[name="password"]', password)
             
             try:
@@ -120,6 +367,7 @@ class OverleafBot:
             if "login" not in self.page.url:
                 logger.info("Auto-login successful.")
                 await self.context.storage_state(path=self.auth_path)
+                self.session.mark_validated()
                 if status_callback: await status_callback("Auto-login successful.")
                 return True
             else:
@@ -127,90 +375,248 @@ class OverleafBot:
                 if status_callback: await status_callback("Auto-login failed.")
                 return False
         except Exception as e:
-            logger.error(f"Auto-login failed: {e}")
+            logger.error("Auto-login failed: %s", e)
             if status_callback: await status_callback(f"Auto-login exception: {e}")
             return False
 
-    async def download_project(self, project_id, output_path, status_callback=None):
+    async def download_project(self, project_id, output_path, status_callback=None, deadline=None):
         """
         Downloads the PDF from a project ID or URL to the specified output path.
-        Returns True on success.
+        :param deadline: Optional Deadline bounding every network/browser wait of the download
+        Returns a DownloadResult (sha256, size, source, post-processing report) on
+        success, or a falsy DownloadFailure (with the expired stage on a deadline).
         """
-        return await self._download_project_with_page(self.page, project_id, output_path, status_callback)
+        with log_context(project=project_label(project_id)), self._trace_job(project_id) as trace:
+            result = await self._try_direct_download(project_id, output_path, status_callback, deadline)
+            if result is None:
+                if trace:
+                    await self._start_trace(trace, self.context, self.page)
+                try:
+                    result = await self._download_project_with_page(self.page, project_id, output_path, status_callback, deadline)
+                finally:
+                    if trace:
+                        await self._stop_trace(trace, self.context, self.page)
+            if trace:
+                trace.record(result)
+        if self.projects:
+            self.projects.save()
+        if self.watchdog:
+            self.watchdog.record_job()
+            reason = self.watchdog.check()
+            if reason:
+                await self.recycle_context(reason)
+        return result
+
+    async def _try_direct_download(self, project_id, output_path, status_callback=None, deadline=None):
+        """
+        Attempts the HTTP fast path.
+        Returns a DownloadResult or DownloadFailure when it settled the download, or None to fall back to the browser.
+        """
+        if self.fetch_mode == "browser":
+            return None
+
+        pid = project_id.rstrip("/").split("/")[-1]
+        if "/read/" in project_id:
+            # Read-only share tokens must be joined through the editor first; once
+            # joined, the cache knows the project ID behind the token.
+            entry = self.projects.get(project_id) if self.projects and self.projects.joined(project_id) else None
+            if not entry or not entry.get("canonical_id"):
+                return None if self.fetch_mode == "auto" else DownloadFailure(PERMANENT, "Read-only links need the browser")
+            pid = entry["canonical_id"]
 
-    async def _download_project_with_page(self, page, project_id, output_path, status_callback=None):
-        """Helper to download a project using a specific page."""
+        if self.fetcher is None:
+            self.fetcher = DirectFetcher(base_url=self.base_url, auth_path=self.auth_path, user_agent=USER_AGENT,
+                                         pacer=self.pacer, max_size=self.max_pdf_size)
+            self._owns_fetcher = True
+
+        deadline = deadline or Deadline()
+        temp_path = output_path + ".tmp"
+        if status_callback: await status_callback("Fetching compiled PDF over HTTP...")
+        try:
+            with deadline.stage("http_fetch"):
+                result = await deadline.wait(self.fetcher.fetch(pid, temp_path, output_path))
+            # Outside the deadline, as on the browser path: cancelling the post-processing
+            # would leave its worker thread writing next to the output.
+            await self._finalize(temp_path, output_path, result)
+            DOWNLOADS.inc(outcome="success", path="http")
+            logger.info("Downloaded (direct): %s", output_path)
+            if status_callback: await status_callback("Download complete.")
+            return result
+        except (DirectFetchError, InvalidPDF, DeadlineExceeded, OSError) as e:
+            DOWNLOADS.inc(outcome="failure", path="http")
+            failure = DownloadFailure.from_exception(e)
+            # No access / deleted project: the browser would fail the same way.
+            if self.fetch_mode == "http" or failure.kind == PERMANENT or failure.stage:
+                logger.error("Direct fetch failed for %s (%s): %s", pid, failure.kind, e)
+                if status_callback: await status_callback(f"Error processing {pid}: {e}")
+                return failure
+            logger.warning("Direct fetch failed for %s, falling back to browser: %s", pid, e)
+            return None
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def _download_project_with_page(self, page, project_id, output_path, status_callback=None, deadline=None):
+        """
+        Helper to download a project using a specific page.
+        Every browser wait is capped by `deadline`; local post-processing is not.
+        """
+        deadline = deadline or Deadline()
         # Normalize URL
         if "http" in project_id:
             url = project_id
             pid = project_id.split("/")[-1]
         else:
-            url = f"https://www.overleaf.com/project/{project_id}"
+            url = f"{self.base_url}/project/{project_id}"
             pid = project_id
+        # A /read/ link we already joined: go straight to the editor.
+        joined = self.projects is not None and self.projects.joined(project_id)
+        url = (self.projects.canonical_url(project_id, self.base_url) if joined else None) or url
+        editor_timeout = self.projects.editor_timeout(project_id) if self.projects else 60.0
             
-        logger.info(f"Processing {pid} -> {url}")
+        logger.info("Processing %s -> %s", pid, url)
         if status_callback: await status_callback(f"Processing project: {pid}")
         
         try:
-            if status_callback: await status_callback(f"Navigating to Overleaf project...")
-            await page.goto(url)
-            await self._random_delay()
-            
-            # 1. Handle Join Interstitial
-            try:
-                join_btn = page.get_by_text("OK, join project")
-                if await join_btn.is_visible(timeout=3000):
-                    logger.info("Joining project...")
-                    await join_btn.click()
-                    await self._random_delay()
-            except:
-                pass
+            with PAGES_IN_FLIGHT.track():
+                if status_callback: await status_callback(f"Navigating to Overleaf project...")
+                response = await self._goto(page, url, deadline)
+                if response is not None and response.status in PERMANENT_STATUSES:
+                    raise ProjectUnavailable(f"Project page returned HTTP {response.status}", status=response.status)
                 
-            # 2. Download
-            download_selector = '[aria-label="Download PDF"]'
-            if status_callback: await status_callback("Waiting for editor to load...")
-            await page.wait_for_selector(download_selector, timeout=60000)
-            
-            # Download to a temporary path first (output_path + .tmp)
-            temp_path = output_path + ".tmp"
-            
-            if status_callback: await status_callback("Initiating PDF download...")
-            async with page.expect_download() as download_info:
-                await page.click(download_selector)
+                # 1. Handle Join Interstitial (only for projects not known to be joined)
+                download_selector = '[aria-label="Download PDF"]'
+                ready_started = time.perf_counter()
+                if not joined:
+                    with deadline.stage("join"):
+                        join_btn = page.get_by_text("OK, join project")
+                        # Whichever shows up first, instead of probing for the button with a fixed timeout.
+                        await page.locator(download_selector).or_(join_btn).first.wait_for(timeout=deadline.timeout_ms(editor_timeout))
+                        try:
+                            if await join_btn.is_visible():
+                                logger.info("Joining project...")
+                                await join_btn.click(timeout=deadline.timeout_ms(30))
+                                await join_btn.wait_for(state="hidden", timeout=deadline.timeout_ms(30))
+                                ready_started = time.perf_counter()
+                        except Exception:
+                            deadline.check()
+                    
+                # 2. Download
+                if status_callback: await status_callback("Waiting for editor to load...")
+                with deadline.stage("editor_ready"):
+                    await page.wait_for_selector(download_selector, timeout=deadline.timeout_ms(editor_timeout))
+                if self.projects is not None:
+                    self.projects.record(project_id, page.url, joined=True, editor_ready=time.perf_counter() - ready_started)
                 
-            download = await download_info.value
-            await download.save_as(temp_path)
-            
-            # If successful, rename temp to target (atomic replacement)
-            os.replace(temp_path, output_path)
+                # Download to a temporary path first (output_path + .tmp)
+                temp_path = output_path + ".tmp"
+                
+                if status_callback: await status_callback("Initiating PDF download...")
+                with deadline.stage("download"):
+                    async with page.expect_download(timeout=deadline.timeout_ms(60)) as download_info:
+                        await page.click(download_selector, timeout=deadline.timeout_ms(30))
+                        
+                    download = await download_info.value
+                    # Take over the browser's own file (validated and hashed in one read)
+                    # instead of copying it with save_as.
+                    source = await deadline.wait(download.path())
+                    sha, size = await asyncio.to_thread(ingest_file, source, temp_path, self.max_pdf_size)
+                
+                # If successful, post-process and rename temp to target (atomic replacement)
+                result = DownloadResult(output_path, sha, size, "browser")
+                await self._finalize(temp_path, output_path, result)
             
-            logger.info(f"Downloaded: {output_path}")
+            DOWNLOADS.inc(outcome="success", path="browser")
+            logger.info("Downloaded: %s", output_path)
             if status_callback: await status_callback("Download complete.")
-            return True
+            return result
             
         except Exception as e:
-            logger.error(f"Failed to process project {pid}: {e}")
+            if os.path.exists(output_path + ".tmp"):
+                os.remove(output_path + ".tmp")
+            # Only when the cached state proved wrong (project gone, access lost, redirected elsewhere):
+            # a timeout or network error keeps the learned join state and editor timing.
+            if self.projects is not None and (isinstance(e, ProjectUnavailable) or self.projects.stale(project_id, page.url)):
+                self.projects.forget(project_id)
+            DOWNLOADS.inc(outcome="failure", path="browser")
+            e = deadline.translate(e)
+            failure = DownloadFailure.from_exception(e)
+            logger.error("Failed to process project %s (%s): %s", pid, failure.kind, e)
             if status_callback: await status_callback(f"Error processing {pid}: {str(e)}")
-            return False
+            return failure
 
-    async def batch_download_projects(self, projects, max_concurrent=3, status_callback=None):
+    async def batch_download_projects(self, projects, max_concurrent=3, status_callback=None, limiter=None,
+                                      retries=0, retry_delay=5.0, journal=None, project_timeout=None):
         """
         Downloads multiple projects in parallel.
         :param projects: List of tuples (project_id, output_path)
-        :param max_concurrent: Max number of simultaneous downloads
+        :param max_concurrent: Max number of simultaneous downloads (fixed), used when no limiter is given
         :param status_callback: Optional async callback for status updates
+        :param limiter: Optional AdaptiveLimiter; adjusts parallelism from per-project latency and failures
+        :param retries: Extra attempts for transient failures (timeouts, navigation errors)
+        :param retry_delay: Base of the jittered exponential backoff between attempts, in seconds
+        :param journal: Optional SyncJournal receiving each project's final outcome
+        :param project_timeout: Optional time budget per project in seconds, retries included
+            (waiting for a concurrency slot is not counted)
+        Returns one result per project: a DownloadResult, or a (falsy) DownloadFailure.
         """
-        semaphore = asyncio.Semaphore(max_concurrent)
-        
+        limiter = limiter or AdaptiveLimiter.static(max_concurrent)
+
+        async def download(project_id, output_path, deadline):
+            direct = await self._try_direct_download(project_id, output_path, status_callback, deadline)
+            if direct is not None:
+                return direct
+            trace = current_trace()
+            if trace and self.tracer.playwright:
+                return await self._download_in_traced_context(trace, project_id, output_path, status_callback, deadline)
+            page = await self._open_page()
+            if trace:
+                trace.attach(page)
+            try:
+                return await self._download_project_with_page(page, project_id, output_path, status_callback, deadline)
+            finally:
+                await self._close_page(page)
+
         async def bounded_download(project_id, output_path):
-            async with semaphore:
-                page = await self.context.new_page()
-                try:
-                    return await self._download_project_with_page(page, project_id, output_path, status_callback)
-                finally:
-                    await page.close()
+            with log_context(project=project_label(project_id)), self._trace_job(project_id) as trace:
+                result = await download_with_retries(project_id, output_path)
+                if trace:
+                    trace.record(result)
+                return result
+
+        async def download_with_retries(project_id, output_path):
+            deadline = None
+
+            async def run_attempt():
+                nonlocal deadline
+                # The budget (and a trace's clock) starts with the first attempt, not while queued for a slot.
+                if deadline is None:
+                    deadline = Deadline(project_timeout)
+                    trace = current_trace()
+                    if trace:
+                        trace.started = time.time()
+                return await download(project_id, output_path, deadline)
+
+            attempt = 0
+            while True:
+                # The limiter slot is only held while downloading, not while backing off.
+                result = await limiter.run(run_attempt)
+                if result or not result.transient or attempt >= retries or result.stage:
+                    break
+                delay = min(backoff_delay(attempt, retry_delay), max(0.0, deadline.remaining()))
+                logger.warning("Transient failure for %s, retrying in %.1fs: %s", project_id, delay, result.error)
+                await asyncio.sleep(delay)
+                attempt += 1
+            if journal:
+                if result:
+                    journal.record(project_id, output_path, "success", attempts=attempt + 1)
+                else:
+                    journal.record(project_id, output_path, result.kind, attempts=attempt + 1, error=result.error)
+            return result
 
         tasks = [bounded_download(pid, path) for pid, path in projects]
         results = await asyncio.gather(*tasks)
+        if self.projects:
+            self.projects.save()
         return results
 
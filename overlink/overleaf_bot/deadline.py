@@ -0,0 +1,85 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from .metrics import stage as timed_stage
+from .retry import TRANSIENT
+
+# A Playwright timeout this close to the deadline is the deadline expiring.
+EXPIRY_SLACK = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """A job ran out of its time budget; `stage` is where it was when that happened."""
+
+    kind = TRANSIENT
+
+    def __init__(self, stage):
+        super().__init__(f"Deadline exceeded during {stage or 'start'}")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    One time budget for a whole job, handed down to every wait.
+
+        deadline = Deadline(120)
+        with deadline.stage("editor_ready"):
+            await page.wait_for_selector(selector, timeout=deadline.timeout_ms(60))
+        await deadline.wait(some_coroutine())
+
+    `seconds=None` means no deadline (waits keep their own caps).
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds if seconds is not None else None
+        self.current = None
+
+    def remaining(self):
+        return float("inf") if self.expires is None else self.expires - time.monotonic()
+
+    def expired(self, slack=0.0):
+        return self.remaining() <= slack
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded(self.current)
+
+    def timeout(self, cap=None):
+        """Seconds a wait may take: its own cap, shortened to what is left of the budget."""
+        self.check()
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def timeout_ms(self, cap):
+        """Playwright-style timeout in milliseconds (cap in seconds)."""
+        return self.timeout(cap) * 1000
+
+    @contextmanager
+    def stage(self, name):
+        """Marks (and times) the stage the job is in, for metrics and timeout reports."""
+        self.current = name
+        self.check()
+        with timed_stage(name):
+            yield
+
+    async def wait(self, awaitable, cap=None):
+        """Awaits something without a timeout of its own, within the budget."""
+        try:
+            timeout = self.timeout(cap)
+        except DeadlineExceeded:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise
+        try:
+            return await asyncio.wait_for(awaitable, None if timeout == float("inf") else timeout)
+        except asyncio.TimeoutError:
+            if self.expired(EXPIRY_SLACK):
+                raise DeadlineExceeded(self.current) from None
+            raise
+
+    def translate(self, exc):
+        """Reports a timeout that coincides with the end of the budget as DeadlineExceeded."""
+        if isinstance(exc, DeadlineExceeded) or not self.expired(EXPIRY_SLACK):
+            return exc
+        return DeadlineExceeded(self.current)
@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import httpx
+from .pacing import default_pacer
+from .pdfstream import MAX_PDF_SIZE, DownloadResult, PdfStream
+from .logger import setup_logger
+
+logger = setup_logger()
+
+CSRF_META = re.compile(r'<meta\s+name="ol-csrfToken"\s+content="([^"]+)"')
+
+
+class DirectFetchError(Exception):
+    """Raised when the HTTP fast path cannot produce a PDF."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def load_cookies(auth_path):
+    """Converts the cookies of a Playwright storage_state file into httpx cookies."""
+    cookies = httpx.Cookies()
+    if not auth_path or not os.path.exists(auth_path):
+        return cookies
+    with open(auth_path, "r") as f:
+        state = json.load(f)
+    for cookie in state.get("cookies", []):
+        cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/")
+        )
+    return cookies
+
+
+class DirectFetcher:
+    """
+    Fetches compiled PDFs straight from the Overleaf HTTP endpoints,
+    reusing the session cookies saved by the browser in auth.json.
+
+    One pooled AsyncClient is shared by every download.
+    """
+
+    def __init__(self, base_url="https://www.overleaf.com", auth_path="auth.json",
+                 user_agent=None, max_connections=10, timeout=60.0, pacer=None, max_size=MAX_PDF_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.max_size = max_size
+        self.pacer = pacer or default_pacer
+        self.auth_path = auth_path
+        self.user_agent = user_agent
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.client = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self):
+        headers = {"User-Agent": self.user_agent} if self.user_agent else {}
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            cookies=load_cookies(self.auth_path),
+            headers=headers,
+            timeout=self.timeout,
+            follow_redirects=False,
+            limits=httpx.Limits(max_connections=self.max_connections)
+        )
+
+    async def stop(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def reload_cookies(self):
+        """Picks up a session refreshed by the browser."""
+        if self.client:
+            self.client.cookies = load_cookies(self.auth_path)
+
+    async def _csrf_token(self, pid):
+        await self.pacer.wait(self.base_url)
+        resp = await self.client.get(f"/project/{pid}")
+        if resp.status_code in (301, 302, 303) and "login" in resp.headers.get("location", ""):
+            raise DirectFetchError("Session is not valid")
+        if resp.status_code != 200:
+            raise DirectFetchError(f"Project page returned HTTP {resp.status_code}", status=resp.status_code)
+        match = CSRF_META.search(resp.text)
+        if not match:
+            raise DirectFetchError("No CSRF token on project page")
+        return match.group(1)
+
+    async def _compile(self, pid, csrf_token):
+        await self.pacer.wait(self.base_url)
+        resp = await self.client.post(
+            f"/project/{pid}/compile",
+            params={"auto_compile": "true"},
+            headers={"X-CSRF-Token": csrf_token, "Accept": "application/json"},
+            json={"check": "silent", "draft": False, "incrementalCompilesEnabled": True}
+        )
+        if resp.status_code != 200:
+            raise DirectFetchError(f"Compile returned HTTP {resp.status_code}", status=resp.status_code)
+        try:
+            data = resp.json()
+        except ValueError as e:
+            # A login or interstitial HTML page served with a 200.
+            raise DirectFetchError(f"Compile returned no JSON ({resp.headers.get('content-type')})") from e
+        if not isinstance(data, dict):
+            raise DirectFetchError("Unexpected compile response")
+        if data.get("status") != "success":
+            raise DirectFetchError(f"Compile status: {data.get('status')}")
+        for output in data.get("outputFiles") or []:
+            if isinstance(output, dict) and output.get("path") == "output.pdf" and output.get("url"):
+                domain = data.get("pdfDownloadDomain") or self.base_url
+                return domain.rstrip("/") + output["url"]
+        raise DirectFetchError("Compile produced no output.pdf")
+
+    async def fetch(self, pid, temp_path, output_path):
+        """
+        Compiles the project and streams its PDF to temp_path, hashing and validating
+        it in the same pass. Only network I/O and the write of temp_path happen here,
+        so the call can be cancelled (e.g. by a deadline) at any point.
+        Returns a DownloadResult for output_path; temp_path is left for the caller to
+        publish. On failure temp_path is removed, and DirectFetchError (so callers can
+        fall back) or InvalidPDF (corrupt or oversized PDF) is raised.
+        """
+        if not self.client:
+            await self.start()
+
+        try:
+            csrf_token = await self._csrf_token(pid)
+            pdf_url = await self._compile(pid, csrf_token)
+
+            stream = PdfStream(self.max_size)
+            async with self.client.stream("GET", pdf_url) as resp:
+                if resp.status_code != 200:
+                    raise DirectFetchError(f"PDF download returned HTTP {resp.status_code}", status=resp.status_code)
+                stream.check_length(resp.headers.get("content-length"))
+                with open(temp_path, "wb") as f:
+                    async for chunk in resp.aiter_bytes():
+                        stream.update(chunk)
+                        f.write(chunk)
+            return DownloadResult(output_path, stream.finish(), stream.size, "http")
+        except BaseException as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if isinstance(e, httpx.HTTPError):
+                raise DirectFetchError(f"HTTP error: {e}") from e
+            if isinstance(e, OSError):
+                raise DirectFetchError(f"Could not write the PDF: {e}") from e
+            raise
+
+    async def download(self, pid, output_path, finalize=None):
+        """
+        Fetches the project's PDF and publishes it to output_path (via a .tmp file).
+        :param finalize: Optional async callable(temp_path, output_path, result) publishing
+            the download instead of a plain os.replace (e.g. to post-process it first).
+        Returns a DownloadResult; raises like fetch().
+        """
+        temp_path = output_path + ".tmp"
+        try:
+            result = await self.fetch(pid, temp_path, output_path)
+            if finalize:
+                await finalize(temp_path, output_path, result)
+            else:
+                os.replace(temp_path, output_path)
+            return result
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
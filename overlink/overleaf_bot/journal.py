@@ -0,0 +1,82 @@
+import json
+import os
+import time
+import uuid
+
+
+class SyncJournal:
+    """
+    Append-only JSONL journal of per-project download outcomes, so an interrupted
+    sync run can be resumed without redoing the projects it already finished.
+
+    Lines are {"event": "start" | "project" | "finish", "run": run_id, "at": ts, ...}.
+    Each record is a single write to a file opened in append mode, so several
+    worker processes can share one journal.
+    """
+
+    def __init__(self, path, run_id=None):
+        self.path = path
+        self.run_id = run_id
+
+    def _append(self, event, **fields):
+        line = json.dumps({"event": event, "run": self.run_id, "at": time.time(), **fields})
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A run killed mid-write can leave a truncated last line.
+                    continue
+        return entries
+
+    def interrupted_run(self, max_age=None):
+        """
+        The (run_id, started_at) of the last run that never finished,
+        or None if it finished or started more than `max_age` seconds ago.
+        """
+        last = None
+        for entry in self.entries():
+            if entry.get("event") == "start":
+                last = (entry["run"], entry["at"])
+            elif entry.get("event") == "finish" and last and entry.get("run") == last[0]:
+                last = None
+        if last and max_age is not None and time.time() - last[1] > max_age:
+            return None
+        return last
+
+    def begin(self, resume=False, max_age=None):
+        """
+        Starts a run. With `resume`, continues the interrupted run (if any, within
+        `max_age`); otherwise previous runs are discarded and a new one is started.
+        Returns True if a run was resumed.
+        """
+        interrupted = self.interrupted_run(max_age) if resume else None
+        if interrupted:
+            self.run_id = interrupted[0]
+            return True
+        self.run_id = uuid.uuid4().hex
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._append("start")
+        return False
+
+    def finish(self):
+        self._append("finish")
+
+    def record(self, project_id, output_path, outcome, attempts=1, error=None):
+        """:param outcome: "success", "transient" or "permanent" """
+        self._append("project", project=project_id, output=output_path, outcome=outcome, attempts=attempts, error=error)
+
+    def completed(self):
+        """Project IDs of this run that downloaded successfully."""
+        return {
+            e["project"] for e in self.entries()
+            if e.get("event") == "project" and e.get("run") == self.run_id and e.get("outcome") == "success"
+        }
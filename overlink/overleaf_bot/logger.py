@@ -1,15 +1,184 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+from collections import OrderedDict
+from contextlib import contextmanager
 
-def setup_logger(name="overlink"):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    
-    if not logger.handlers:
-        logger.addHandler(handler)
-        
-    return logger
+ROOT = "overlink"
+# "text" (human readable) or "json" (one object per line, for log pipelines).
+LOG_FORMAT = os.getenv("OVERLINK_LOG_FORMAT", "text")
+LOG_LEVEL = os.getenv("OVERLINK_LOG_LEVEL", "INFO").upper()
+# Per-level sampling, e.g. "info=0.1" keeps one in ten of each repeated INFO message.
+LOG_SAMPLE = os.getenv("OVERLINK_LOG_SAMPLE", "")
+CONTEXT_FIELDS = ("job", "project", "stage")
+
+_context = contextvars.ContextVar("overlink_log_context", default={})
+_listener = None
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Adds fields (job, project, stage) to every record logged inside the block,
+    including by tasks started from it: `with log_context(project=pid): ...`
+    """
+    token = _context.set({**_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current log context onto the record (runs in the logging thread of the caller)."""
+
+    def filter(self, record):
+        for key, value in _context.get().items():
+            setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every 1/rate records of each message template at a sampled level,
+    starting with the first, so repeated per-project messages cannot flood the log.
+    Kept records carry `sample` (the N of "1 in N"). Counters are kept for the
+    `max_templates` most recently seen templates only.
+    """
+
+    def __init__(self, rates, max_templates=1024):
+        super().__init__()
+        self.every = {level: (0 if rate <= 0 else max(1, round(1 / rate))) for level, rate in rates.items()}
+        self.max_templates = max_templates
+        self.counts = OrderedDict()
+
+    def filter(self, record):
+        every = self.every.get(record.levelno)
+        if every is None or every == 1:
+            return True
+        if every == 0:
+            return False
+        key = (record.levelno, record.name, record.msg)
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        self.counts.move_to_end(key)
+        if len(self.counts) > self.max_templates:
+            self.counts.popitem(last=False)
+        record.sample = every
+        return count % every == 0
+
+
+def parse_sample(spec):
+    """Parses "debug=0.01,info=0.2" into {logging.DEBUG: 0.01, logging.INFO: 0.2}."""
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        level, _, rate = part.partition("=")
+        rates[logging.getLevelName(level.strip().upper())] = float(rate)
+    return rates
+
+
+class TextFormatter(logging.Formatter):
+    """The classic format, with the context fields appended when present."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        text = super().format(record)
+        fields = " ".join(f"{k}={getattr(record, k)}" for k in CONTEXT_FIELDS if getattr(record, k, None) is not None)
+        if not fields:
+            return text
+        # The fields go on the message line, before any traceback.
+        line, newline, rest = text.partition("\n")
+        return f"{line} [{fields}]{newline}{rest}"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, the context fields and `sample` if sampled."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key in CONTEXT_FIELDS + ("sample",):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records for the listener. Unlike QueueHandler, it keeps the traceback
+    apart from the message (as exc_text) so the output formatter can place it.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        # Merge the arguments now: they may change (or be unsafe to read) by the time the listener runs.
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            # Traceback objects pin the frames of the caller; the text is all the formatter needs.
+            record.exc_info = None
+        return record
+
+
+_exception_formatter = logging.Formatter()
+
+
+def _configure(logger):
+    """
+    Logs through a queue: callers only enqueue the record, and a listener thread
+    formats and writes it, so slow stdout never blocks the event loop.
+    """
+    global _listener
+    records = queue.SimpleQueue()
+    handler = StructuredQueueHandler(records)
+    handler.addFilter(ContextFilter())
+    rates = parse_sample(LOG_SAMPLE)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    atexit.register(stop_logging)
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(handler)
+
+
+def stop_logging():
+    """Flushes the queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logger(name=ROOT):
+    """
+    Returns the logger `name` (the "overlink" logger or one of its children),
+    configuring the shared queue-based handler on first use.
+    Prefer lazy arguments on hot paths: logger.info("Downloaded %s", path).
+    """
+    root = logging.getLogger(ROOT)
+    if not root.handlers:
+        _configure(root)
+    return logging.getLogger(name)
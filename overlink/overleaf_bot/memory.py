@@ -0,0 +1,130 @@
+import os
+import time
+from .metrics import BROWSER_RSS
+
+try:
+    import psutil
+except ImportError:  # optional dependency; /proc is read directly on Linux
+    psutil = None
+
+BROWSER_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+def _proc_tree():
+    """Yields (pid, ppid, name, cmdline, rss) for every process, from /proc."""
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read().decode(errors="replace")
+            with open(f"/proc/{entry}/statm", "rb") as f:
+                rss = int(f.read().split()[1]) * page_size
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace")
+        except (OSError, IndexError, ValueError):
+            continue
+        # The name is in parentheses and may contain spaces; fields follow the last ")".
+        name = stat[stat.index("(") + 1:stat.rindex(")")]
+        ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        yield int(entry), ppid, name, cmdline, rss
+
+
+def _psutil_tree():
+    for proc in psutil.process_iter(["pid", "ppid", "name", "cmdline", "memory_info"]):
+        info = proc.info
+        if info["memory_info"] is None:
+            continue
+        yield info["pid"], info["ppid"], info["name"] or "", " ".join(info["cmdline"] or ()), info["memory_info"].rss
+
+
+def sample_browser_memory(root_pid=None):
+    """
+    Resident memory of the Chromium processes started by this process (through the
+    Playwright driver): {"total": bytes, "renderers": bytes, "processes": n}.
+    Returns None where process memory cannot be read.
+    """
+    if psutil is not None:
+        processes = _psutil_tree()
+    elif os.path.isdir("/proc"):
+        processes = _proc_tree()
+    else:
+        return None
+    root_pid = root_pid or os.getpid()
+    children, info = {}, {}
+    for pid, ppid, name, cmdline, rss in processes:
+        children.setdefault(ppid, []).append(pid)
+        info[pid] = (name.lower(), cmdline, rss)
+    total, renderers, count = 0, 0, 0
+    pending = list(children.get(root_pid, ()))
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, ()))
+        name, cmdline, rss = info[pid]
+        if not any(browser in name for browser in BROWSER_NAMES):
+            continue
+        total += rss
+        count += 1
+        if "--type=renderer" in cmdline:
+            renderers += rss
+    return {"total": total, "renderers": renderers, "processes": count}
+
+
+class MemoryWatchdog:
+    """
+    Decides when a browser context should be recycled: after `max_jobs` jobs, or
+    once the browser's resident memory exceeds `max_rss` bytes. Memory is sampled
+    at most every `interval` seconds, so checking after every job stays cheap.
+    Either limit may be None (disabled).
+
+    A recycle only frees one context's pages, not the browser's own processes, so
+    over `max_rss` a memory recycle is also required to reclaim something: the
+    memory must have grown by `min_growth` bytes (default: a tenth of `max_rss`)
+    since the sample taken right after the last recycle, and at least
+    `min_interval` seconds must have passed since it.
+    """
+
+    def __init__(self, max_jobs=None, max_rss=None, interval=10.0, min_growth=None, min_interval=60.0):
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        self.interval = interval
+        self.min_growth = min_growth if min_growth is not None else (max_rss or 0) // 10
+        self.min_interval = min_interval
+        self.jobs = 0
+        self.last_sample = None
+        self.baseline = 0
+        self._sampled_at = 0.0
+        self._recycled_at = None
+
+    def sample(self, force=False):
+        now = time.monotonic()
+        if force or self.last_sample is None or now - self._sampled_at >= self.interval:
+            self.last_sample = sample_browser_memory()
+            self._sampled_at = now
+            if self.last_sample is not None:
+                BROWSER_RSS.set(self.last_sample["total"])
+        return self.last_sample
+
+    def record_job(self):
+        self.jobs += 1
+
+    def check(self):
+        """The reason to recycle now ("jobs" or "memory"), or None."""
+        if self.max_jobs and self.jobs >= self.max_jobs:
+            return "jobs"
+        if self.max_rss:
+            if self._recycled_at is not None and time.monotonic() - self._recycled_at < self.min_interval:
+                return None
+            memory = self.sample()
+            if memory is not None and memory["total"] >= self.max_rss and memory["total"] - self.baseline >= self.min_growth:
+                return "memory"
+        return None
+
+    def reset(self):
+        """Call after a recycle: restarts the job count and the interval, and samples the new baseline."""
+        self.jobs = 0
+        self._recycled_at = time.monotonic()
+        if self.max_rss:
+            memory = self.sample(force=True)
+            self.baseline = memory["total"] if memory is not None else 0
@@ -0,0 +1,194 @@
+import threading
+import time
+from contextlib import contextmanager
+from .logger import log_context
+from .tracing import trace_span
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class Metric:
+    """Base class: one value per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, key, extra=None):
+        pairs = list(zip(self.labels, key)) + list(extra or [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        return [f"{self.name}{self._format_labels(k)} {v}" for k, v in sorted(self._values.items())]
+
+    def snapshot(self):
+        return [{"labels": dict(zip(self.labels, k)), "value": v} for k, v in sorted(self._values.items())]
+
+    def merge(self, data):
+        for item in data:
+            self.inc(item["value"], **item["labels"])
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Increments the gauge for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    render = Counter.render
+    snapshot = Counter.snapshot
+
+    def merge(self, data):
+        for item in data:
+            self.set(item["value"], **item["labels"])
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            counts = [c + (1 if value <= b else 0) for c, b in zip(counts, self.buckets)]
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the block, labelled outcome=success|error."""
+        start = time.perf_counter()
+        outcome = "success"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            self.observe(time.perf_counter() - start, outcome=outcome, **labels)
+
+    def render(self):
+        lines = []
+        for key, (counts, total, count) in sorted(self._values.items()):
+            for bound, c in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', bound)])} {c}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+    def snapshot(self):
+        return [
+            {"labels": dict(zip(self.labels, k)), "buckets": dict(zip(self.buckets, counts)), "sum": total, "count": count}
+            for k, (counts, total, count) in sorted(self._values.items())
+        ]
+
+    def merge(self, data):
+        for item in data:
+            key = self._key(item["labels"])
+            incoming = [item["buckets"].get(b, item["buckets"].get(str(b), 0)) for b in self.buckets]
+            with self._lock:
+                counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+                self._values[key] = (
+                    [a + b for a, b in zip(counts, incoming)], total + item["sum"], count + item["count"]
+                )
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.metrics.get(name) or self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.metrics.get(name) or self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.metrics.get(name) or self.register(Histogram(name, help, labels, buckets))
+
+    def render_prometheus(self):
+        """Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {name: {"type": m.kind, "values": m.snapshot()} for name, m in self.metrics.items()}
+
+    def merge(self, snapshot):
+        """Adds a snapshot from another process (e.g. a sync worker)."""
+        for name, data in snapshot.items():
+            if name in self.metrics:
+                self.metrics[name].merge(data["values"])
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "overlink_stage_seconds", "Duration of OverleafBot stages", labels=("stage", "outcome")
+)
+DOWNLOADS = REGISTRY.counter(
+    "overlink_downloads_total", "Project downloads by result and retrieval path", labels=("outcome", "path")
+)
+PAGES_IN_FLIGHT = REGISTRY.gauge("overlink_pages_in_flight", "Browser pages currently processing a project")
+CONCURRENCY_LIMIT = REGISTRY.gauge("overlink_concurrency_limit", "Current adaptive download concurrency limit")
+QUEUE_DEPTH = REGISTRY.gauge("overlink_queue_depth", "Unfinished jobs in the mirror queue")
+BROWSER_RSS = REGISTRY.gauge("overlink_browser_rss_bytes", "Resident memory of the Chromium processes of this process")
+CONTEXT_RECYCLES = REGISTRY.counter(
+    "overlink_context_recycles_total", "Browser contexts replaced, by reason", labels=("reason",)
+)
+
+
+@contextmanager
+def stage(name):
+    """Times one bot stage, tags its log records and traces it: `with stage("navigation"): ...`"""
+    with STAGE_SECONDS.time(stage=name), log_context(stage=name), trace_span(name):
+        yield
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import random
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, holding at most `burst`.
+    A rate of 0 (or less) disables limiting.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters in FIFO order.
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class Pacer:
+    """
+    Paces requests per host with one shared token bucket per host,
+    optionally adding a random jitter after each acquired token.
+    """
+
+    def __init__(self, rate=2.0, burst=4, jitter=0.0):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self._buckets = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            rate=float(os.getenv("OVERLINK_RATE", "2")),
+            burst=int(os.getenv("OVERLINK_BURST", "4")),
+            jitter=float(os.getenv("OVERLINK_JITTER", "0"))
+        )
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc or url
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    async def wait(self, url):
+        """Blocks until a request to the host of `url` is allowed."""
+        await self.bucket(url).acquire()
+        if self.jitter > 0:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+
+
+# Shared by every bot, page and context in the process unless one is passed explicitly.
+default_pacer = Pacer.from_env()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+from .retry import PERMANENT, TRANSIENT
+
+MAX_PDF_SIZE = int(os.getenv("OVERLINK_MAX_PDF_SIZE", str(100 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+# A PDF ends with "%%EOF", possibly followed by a few bytes of whitespace or padding.
+TAIL_SIZE = 1024
+
+
+class InvalidPDF(Exception):
+    """The downloaded bytes are not an acceptable PDF (corrupt, truncated or too large)."""
+
+    def __init__(self, message, kind=TRANSIENT):
+        super().__init__(message)
+        self.kind = kind
+
+
+class DownloadResult:
+    """
+    A successful download. Truthy, like the `True` it replaces.
+    :param sha256: Hash of the raw downloaded bytes (before post-processing)
+    :param source: "http" or "browser"
+    :param report: Post-processing report, if a pipeline ran
+    """
+
+    def __init__(self, output_path, sha256, size, source, report=None):
+        self.output_path = output_path
+        self.sha256 = sha256
+        self.size = size
+        self.source = source
+        self.report = report
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f"DownloadResult({self.output_path!r}, {self.sha256[:12]}, {self.size} bytes, {self.source})"
+
+
+class PdfStream:
+    """
+    Checks and hashes a PDF chunk by chunk while it is being written:
+    sha256, size limit, "%PDF-" header and "%%EOF" trailer.
+
+        stream = PdfStream(max_size)
+        for chunk in chunks:
+            stream.update(chunk)   # raises InvalidPDF as soon as it can tell
+            f.write(chunk)
+        sha = stream.finish()      # raises InvalidPDF on a missing trailer
+    """
+
+    def __init__(self, max_size=MAX_PDF_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self._sha = hashlib.sha256()
+        self._head = b""
+        self._tail = b""
+
+    def check_length(self, length):
+        """Rejects a download up front from its announced length (e.g. Content-Length)."""
+        if self.max_size and length is not None and int(length) > self.max_size:
+            raise InvalidPDF(f"PDF is {length} bytes, over the {self.max_size} byte limit", PERMANENT)
+
+    def update(self, chunk):
+        self.size += len(chunk)
+        if self.max_size and self.size > self.max_size:
+            raise InvalidPDF(f"PDF exceeds the {self.max_size} byte limit", PERMANENT)
+        if len(self._head) < 5:
+            self._head += chunk[:5 - len(self._head)]
+            if len(self._head) == 5 and self._head != b"%PDF-":
+                raise InvalidPDF("Response is not a PDF")
+        self._tail = (self._tail + chunk[-TAIL_SIZE:])[-TAIL_SIZE:]
+        self._sha.update(chunk)
+
+    def finish(self):
+        """Returns the sha256 hex digest once the whole file passed validation."""
+        if self._head != b"%PDF-":
+            raise InvalidPDF("Response is not a PDF")
+        if b"%%EOF" not in self._tail:
+            raise InvalidPDF("PDF is truncated (no %%EOF trailer)")
+        return self._sha.hexdigest()
+
+
+def ingest_file(src, dst, max_size=MAX_PDF_SIZE):
+    """
+    Moves a file the browser already wrote (e.g. a Playwright download) to `dst`,
+    validating and hashing it on the way. On the same filesystem that is one read
+    plus a rename; otherwise the file is copied in the same single pass.
+    Returns (sha256, size).
+    """
+    stream = PdfStream(max_size)
+    stream.check_length(os.path.getsize(src))
+    same_device = os.stat(src).st_dev == os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+    with open(src, "rb") as f:
+        if same_device:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                stream.update(chunk)
+            sha = stream.finish()
+            os.replace(src, dst)
+        else:
+            try:
+                with open(dst, "wb") as out:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        stream.update(chunk)
+                        out.write(chunk)
+                sha = stream.finish()
+            except BaseException:
+                if os.path.exists(dst):
+                    os.remove(dst)
+                raise
+    return sha, stream.size
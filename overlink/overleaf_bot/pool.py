@@ -0,0 +1,213 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from .core import OverleafBot, BASE_URL, USER_AGENT, close_page, context_args
+from .fetch import DirectFetcher
+from .pacing import default_pacer
+from .pdfstream import MAX_PDF_SIZE
+from .session import SessionManager
+from .metrics import CONTEXT_RECYCLES
+from .logger import setup_logger
+
+logger = setup_logger()
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium shared by many requests.
+
+    Keeps `size` authenticated browser contexts warm and leases a fresh page
+    (wrapped in an OverleafBot) to each caller. Contexts are recycled after
+    `max_uses` leases so a long-running server does not accumulate state.
+    The session is refreshed in the background before it expires; contexts
+    created from the old storage_state are then recycled on release.
+    With a MemoryWatchdog, contexts are also recycled on release while the
+    browser's memory is above the watchdog's limit.
+    A context that cannot be replaced leaves an empty slot (None) in the idle
+    queue; the next lease of that slot creates the context, so the pool never shrinks.
+    """
+
+    def __init__(self, size=2, headless=True, auth_path="auth.json", max_uses=50,
+                 base_url=BASE_URL, fetch_mode="browser", pacer=None, postprocess=None,
+                 downloads_path=None, max_pdf_size=MAX_PDF_SIZE, project_cache=None, watchdog=None, tracer=None):
+        self.size = size
+        self.headless = headless
+        self.auth_path = auth_path
+        self.max_uses = max_uses
+        self.base_url = base_url
+        self.fetch_mode = fetch_mode
+        self.pacer = pacer or default_pacer
+        self.postprocess = postprocess
+        self.downloads_path = downloads_path
+        self.max_pdf_size = max_pdf_size
+        self.project_cache = project_cache
+        self.watchdog = watchdog
+        self.tracer = tracer
+        self.fetcher = None
+        self.session = SessionManager(auth_path, base_url)
+        self._credentials = (None, None)
+        self._generation = 0
+        self._context_generation = {}
+        self.playwright = None
+        self.browser = None
+        self._idle = asyncio.Queue()
+        self._uses = {}
+        self._contexts = set()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self, email=None, password=None):
+        """Launches the browser, authenticates once and warms up the contexts."""
+        self._credentials = (email, password)
+        self.playwright = await async_playwright().start()
+        if self.downloads_path:
+            os.makedirs(self.downloads_path, exist_ok=True)
+        self.browser = await self.playwright.chromium.launch(headless=self.headless, downloads_path=self.downloads_path)
+
+        # Authenticate with the first context; the rest reuse the saved session.
+        first = await self._new_context()
+        page = await first.new_page()
+        try:
+            bot = OverleafBot.from_context(
+                first, page, auth_path=self.auth_path, base_url=self.base_url, pacer=self.pacer, session=self.session
+            )
+            if not await bot.login(email=email, password=password, manual=False):
+                logger.warning("Browser pool started without a valid session.")
+        finally:
+            await page.close()
+        self._idle.put_nowait(first)
+
+        if self.fetch_mode != "browser":
+            self.fetcher = DirectFetcher(base_url=self.base_url, auth_path=self.auth_path, user_agent=USER_AGENT,
+                                         pacer=self.pacer, max_size=self.max_pdf_size)
+            await self.fetcher.start()
+
+        for _ in range(self.size - 1):
+            self._idle.put_nowait(await self._new_context())
+        self.session.start_refresher(self._refresh_session)
+        logger.info("Browser pool ready with %s contexts.", self.size)
+
+    async def _refresh_session(self):
+        async with self.lease() as bot:
+            refreshed = await bot.refresh_session(*self._credentials)
+        if refreshed:
+            # Contexts still carry the old cookies: recycle them as they come back.
+            self._generation += 1
+            if self.fetcher:
+                self.fetcher.reload_cookies()
+        else:
+            logger.error("Background session refresh failed.")
+
+    async def stop(self):
+        await self.session.stop_refresher()
+        if self.fetcher:
+            await self.fetcher.stop()
+            self.fetcher = None
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for context in list(self._contexts):
+            await self._close_context(context, save=self._context_generation.get(context) == self._generation)
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def _new_context(self):
+        context = await self.browser.new_context(**context_args(self.auth_path, self.headless))
+        self._contexts.add(context)
+        self._uses[context] = 0
+        self._context_generation[context] = self._generation
+        return context
+
+    async def _close_context(self, context, save=False):
+        self._contexts.discard(context)
+        self._uses.pop(context, None)
+        self._context_generation.pop(context, None)
+        try:
+            if save and self.auth_path:
+                await context.storage_state(path=self.auth_path)
+        except Exception:
+            pass
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning("Failed to close browser context: %s", e)
+
+    async def _release(self, context, broken=False):
+        """Returns a context to the pool, replacing it if it is worn out, stale or broken."""
+        if context not in self._contexts:
+            return
+        self._uses[context] += 1
+        stale = self._context_generation[context] < self._generation
+        if broken:
+            reason = "broken"
+        elif stale:
+            reason = "stale"
+        elif self._uses[context] >= self.max_uses:
+            reason = "jobs"
+        else:
+            reason = self.watchdog.check() if self.watchdog else None
+        if reason:
+            logger.info("Recycling browser context (%s).", reason)
+            # A leased context is exclusive, so it is already drained here.
+            await self._close_context(context, save=not stale and not broken)
+            try:
+                context = await self._new_context()
+            except Exception as e:
+                # Keep the slot; the next lease retries instead of handing out a dead context.
+                logger.error("Failed to recycle browser context, retrying on next lease: %s", e)
+                context = None
+            CONTEXT_RECYCLES.inc(reason=reason)
+            if self.watchdog and reason == "memory":
+                self.watchdog.reset()
+        self._idle.put_nowait(context)
+
+    async def _take(self):
+        """The next idle context, creating it first if its slot is empty."""
+        context = await self._idle.get()
+        if context is None:
+            try:
+                context = await self._new_context()
+            except BaseException:
+                self._idle.put_nowait(None)
+                raise
+        return context
+
+    @asynccontextmanager
+    async def lease(self, deadline=None):
+        """
+        Yields an OverleafBot bound to a pooled context and a fresh page.
+        Waits until a context is free if all of them are in use, at most until
+        `deadline` (a Deadline) expires. The page is closed and the context
+        returned even if the caller is cancelled.
+        """
+        if deadline is not None:
+            with deadline.stage("lease"):
+                context = await deadline.wait(self._take())
+        else:
+            context = await self._take()
+        page = None
+        closed = False
+        try:
+            page = await context.new_page()
+            closed = True
+            yield OverleafBot.from_context(
+                context, page, auth_path=self.auth_path, base_url=self.base_url,
+                fetch_mode=self.fetch_mode, fetcher=self.fetcher, pacer=self.pacer, session=self.session,
+                postprocess=self.postprocess, max_pdf_size=self.max_pdf_size, project_cache=self.project_cache,
+                tracer=self.tracer
+            )
+        finally:
+            try:
+                if page:
+                    closed = await close_page(page)
+            finally:
+                await self._release(context, broken=not closed)
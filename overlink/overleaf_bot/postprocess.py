@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import os
+from .logger import setup_logger
+
+logger = setup_logger()
+
+try:
+    import pikepdf
+except ImportError:  # optional dependency
+    pikepdf = None
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Stage:
+    """A post-processing step: reads `src` and writes the processed PDF to `dst`."""
+
+    name = "stage"
+
+    def available(self):
+        return True
+
+    def process(self, src, dst):
+        raise NotImplementedError
+
+
+class PikepdfOptimizer(Stage):
+    """
+    Lossless optimization with pikepdf: dedupes identical streams, drops
+    unreferenced resources, recompresses streams into object streams and
+    linearizes the file for fast web view.
+    """
+
+    name = "pikepdf"
+
+    def __init__(self, linearize=True, recompress=True, dedupe=True):
+        self.linearize = linearize
+        self.recompress = recompress
+        self.dedupe = dedupe
+
+    def available(self):
+        return pikepdf is not None
+
+    @staticmethod
+    def _dedupe_xobjects(pdf):
+        """Points identical image/form XObjects of all pages at a single object."""
+        seen = {}
+        for page in pdf.pages:
+            resources = page.obj.get("/Resources")
+            xobjects = resources.get("/XObject") if resources is not None else None
+            if xobjects is None:
+                continue
+            for key in list(xobjects.keys()):
+                xobj = xobjects[key]
+                if not isinstance(xobj, pikepdf.Stream):
+                    continue
+                digest = hashlib.sha256(xobj.read_raw_bytes() + repr(sorted(
+                    (k, str(v)) for k, v in xobj.items() if k != "/Length"
+                )).encode()).hexdigest()
+                if digest in seen:
+                    xobjects[key] = seen[digest]
+                else:
+                    seen[digest] = xobj
+
+    def process(self, src, dst):
+        with pikepdf.open(src) as pdf:
+            if self.dedupe:
+                self._dedupe_xobjects(pdf)
+                pdf.remove_unreferenced_resources()
+            options = {"linearize": self.linearize}
+            if self.recompress:
+                options.update(
+                    compress_streams=True,
+                    recompress_flate=True,
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate
+                )
+            pdf.save(dst, **options)
+
+
+class Pipeline:
+    """
+    Runs post-processing stages on a freshly downloaded PDF, in place. A stage's
+    output is kept only if it is smaller than its input.
+
+    :param is_unchanged: Optional callable(key, sha256) telling whether this exact
+        input was already processed and published; the stages are then skipped.
+    Reports (input hash, before/after sizes, stages kept, stages discarded for not
+    shrinking the file) are kept per key in `reports`.
+    """
+
+    def __init__(self, stages=None, is_unchanged=None):
+        self.stages = [s for s in (stages or []) if s.available()]
+        self.is_unchanged = is_unchanged
+        self.reports = {}
+        for stage in stages or []:
+            if not stage.available():
+                logger.warning("PDF post-processing stage '%s' unavailable, skipping.", stage.name)
+
+    def _run(self, path, key, input_sha=None):
+        input_sha = input_sha or sha256_file(path)
+        before = os.path.getsize(path)
+        report = {"input_sha256": input_sha, "before": before, "after": before, "stages": [], "discarded": [],
+                  "skipped": False}
+
+        if self.is_unchanged and self.is_unchanged(key, input_sha):
+            report["skipped"] = True
+            return report
+
+        for stage in self.stages:
+            out_path = f"{path}.{stage.name}"
+            try:
+                stage.process(path, out_path)
+            except Exception as e:
+                logger.warning("PDF stage '%s' failed for %s: %s", stage.name, key, e)
+                if os.path.exists(out_path):
+                    os.remove(out_path)
+                continue
+            if os.path.getsize(out_path) >= os.path.getsize(path):
+                # Already well compressed (common for LaTeX output): keep the original bytes.
+                os.remove(out_path)
+                report["discarded"].append(stage.name)
+                continue
+            os.replace(out_path, path)
+            report["stages"].append(stage.name)
+
+        report["after"] = os.path.getsize(path)
+        return report
+
+    async def run(self, path, key=None, sha=None):
+        """
+        Processes `path` in a worker thread and returns the report.
+        :param sha: sha256 of `path` if the caller already computed it while downloading.
+        """
+        report = await asyncio.to_thread(self._run, path, key, sha)
+        self.reports[key] = report
+        if report["stages"]:
+            logger.info("Optimized %s: %s -> %s bytes (%s)", key, report["before"], report["after"], ", ".join(report["stages"]))
+        return report
+
+
+def default_pipeline(is_unchanged=None):
+    return Pipeline([PikepdfOptimizer()], is_unchanged=is_unchanged)
@@ -0,0 +1,133 @@
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; saves are then only atomic, not serialized
+    fcntl = None
+
+PROJECT_URL = re.compile(r"/project/([0-9a-f]{24})")
+
+
+class ProjectCache:
+    """
+    Per-project metadata learned while downloading, persisted as JSON:
+    the canonical project ID a /read/ link resolves to, whether the account has
+    already joined it, and a moving average of how long the editor takes to show
+    the "Download PDF" control. Keyed by the project ID or URL as configured.
+
+    save() merges with the file on disk under an exclusive lock (<path>.lock), so
+    several sync workers can share one cache.
+    """
+
+    def __init__(self, path, default_timeout=60.0, min_timeout=20.0, timeout_factor=4.0, smoothing=0.3):
+        self.path = path
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.timeout_factor = timeout_factor
+        self.smoothing = smoothing
+        self.entries = {}
+        self._dirty = set()
+        self._removed = set()
+        self.load()
+
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def load(self):
+        self.entries = self._read()
+        return self.entries
+
+    @contextmanager
+    def _locked(self):
+        """Serializes read-merge-write cycles across processes."""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        if not self.path or not (self._dirty or self._removed):
+            return
+        with self._locked():
+            entries = self._read()
+            for key in self._removed:
+                entries.pop(key, None)
+            for key in self._dirty:
+                if key in self.entries:
+                    entries[key] = self.entries[key]
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(entries, f, indent=4, sort_keys=True)
+            os.replace(temp_path, self.path)
+        self.entries = entries
+        self._dirty.clear()
+        self._removed.clear()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def joined(self, key):
+        entry = self.entries.get(key)
+        return bool(entry and entry.get("joined"))
+
+    def canonical_url(self, key, base_url):
+        """The direct editor URL of an already joined project, or None."""
+        entry = self.entries.get(key)
+        if entry and entry.get("joined") and entry.get("canonical_id"):
+            return f"{base_url}/project/{entry['canonical_id']}"
+        return None
+
+    def editor_timeout(self, key):
+        """Seconds to wait for the editor: a multiple of its usual ready time, never above the default."""
+        entry = self.entries.get(key)
+        if not entry or not entry.get("editor_ready"):
+            return self.default_timeout
+        return min(self.default_timeout, max(self.min_timeout, entry["editor_ready"] * self.timeout_factor))
+
+    def record(self, key, page_url=None, joined=True, editor_ready=None):
+        """Records a successful editor load of `key` (landing on `page_url`)."""
+        entry = dict(self.entries.get(key) or {})
+        match = PROJECT_URL.search(page_url or "")
+        if match:
+            entry["canonical_id"] = match.group(1)
+        entry["joined"] = joined
+        if editor_ready is not None:
+            previous = entry.get("editor_ready")
+            entry["editor_ready"] = round(editor_ready if previous is None else
+                                          previous + self.smoothing * (editor_ready - previous), 3)
+        entry["updated_at"] = int(time.time())
+        self.entries[key] = entry
+        self._dirty.add(key)
+        self._removed.discard(key)
+
+    def stale(self, key, page_url):
+        """
+        True if `key` is cached as joined but the editor now lands somewhere other than its
+        project. A redirect to the login page is an expired session, not a stale entry.
+        """
+        entry = self.entries.get(key)
+        if not entry or not entry.get("joined") or not entry.get("canonical_id") or "/login" in (page_url or ""):
+            return False
+        match = PROJECT_URL.search(page_url or "")
+        return not match or match.group(1) != entry["canonical_id"]
+
+    def forget(self, key):
+        """Drops what we know about `key` (once it proved wrong), so the next attempt probes again."""
+        if self.entries.pop(key, None) is not None:
+            self._removed.add(key)
+            self._dirty.discard(key)
@@ -0,0 +1,63 @@
+import random
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# HTTP statuses meaning the project is gone or not shared with us; retrying cannot help.
+PERMANENT_STATUSES = (401, 403, 404, 410)
+
+
+class ProjectUnavailable(Exception):
+    """The project does not exist (any more) or the account has no access to it."""
+
+    kind = PERMANENT
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class DownloadFailure:
+    """
+    Result of a failed download. Falsy, so callers checking `if result:` keep working.
+    :param kind: TRANSIENT (worth retrying) or PERMANENT
+    :param stage: Stage the download was in when its deadline expired, if it did
+    """
+
+    def __init__(self, kind, error, stage=None):
+        self.kind = kind
+        self.error = error
+        self.stage = stage
+
+    def __bool__(self):
+        return False
+
+    @property
+    def transient(self):
+        return self.kind == TRANSIENT
+
+    def __repr__(self):
+        return f"DownloadFailure({self.kind}, {self.error!r})"
+
+    @classmethod
+    def from_exception(cls, exc):
+        return cls(classify(exc), str(exc), getattr(exc, "stage", None))
+
+
+def classify(exc):
+    """
+    Sorts a download error into TRANSIENT (timeouts, navigation/network errors,
+    throttling, server errors, expired session) or PERMANENT (deleted project, no access).
+    Errors may carry their own `kind`, or the HTTP `status` that caused them.
+    """
+    kind = getattr(exc, "kind", None)
+    if kind in (TRANSIENT, PERMANENT):
+        return kind
+    if getattr(exc, "status", None) in PERMANENT_STATUSES:
+        return PERMANENT
+    return TRANSIENT
+
+
+def backoff_delay(attempt, base=5.0, cap=300.0):
+    """Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
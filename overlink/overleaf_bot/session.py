@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import time
+import httpx
+from .fetch import load_cookies
+from .logger import setup_logger
+
+logger = setup_logger()
+
+SESSION_COOKIES = ("overleaf_session2", "sharelatex.sid")
+
+
+class SessionManager:
+    """
+    Decides cheaply whether the session in a storage_state file is still usable.
+
+    The common case costs no I/O beyond reading auth.json: the session cookie has
+    not expired and was validated less than `ttl` seconds ago. Otherwise one
+    authenticated HTTP probe is made. A background task can refresh the session
+    before the cookie expires.
+    """
+
+    def __init__(self, auth_path="auth.json", base_url="https://www.overleaf.com", ttl=6 * 3600, refresh_margin=12 * 3600):
+        self.auth_path = auth_path
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.meta_path = f"{auth_path}.meta.json" if auth_path else None
+        self._refresher = None
+
+    def _session_cookies(self):
+        if not self.auth_path or not os.path.exists(self.auth_path):
+            return []
+        try:
+            with open(self.auth_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [c for c in state.get("cookies", []) if c.get("name") in SESSION_COOKIES]
+
+    def cookie_expiry(self):
+        """Earliest expiry of the session cookies (None for browser-session cookies or no cookie)."""
+        expiries = [c["expires"] for c in self._session_cookies() if c.get("expires", -1) > 0]
+        return min(expiries) if expiries else None
+
+    @property
+    def validated_at(self):
+        if not self.meta_path or not os.path.exists(self.meta_path):
+            return 0
+        try:
+            with open(self.meta_path, "r") as f:
+                return json.load(f).get("validated_at", 0)
+        except (OSError, ValueError):
+            return 0
+
+    def mark_validated(self, now=None):
+        if not self.meta_path:
+            return
+        temp_path = self.meta_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"validated_at": time.time() if now is None else now}, f)
+        os.replace(temp_path, self.meta_path)
+
+    def invalidate(self):
+        if self.meta_path and os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+    def is_fresh(self, now=None):
+        """True if the session can be trusted without any network request."""
+        now = time.time() if now is None else now
+        if not self._session_cookies():
+            return False
+        expiry = self.cookie_expiry()
+        if expiry is not None and expiry <= now + 60:
+            return False
+        return now - self.validated_at < self.ttl
+
+    def needs_refresh(self, now=None):
+        now = time.time() if now is None else now
+        expiry = self.cookie_expiry()
+        return expiry is not None and expiry - now < self.refresh_margin
+
+    async def probe(self):
+        """One authenticated request; True if Overleaf does not bounce us to the login page."""
+        if not self._session_cookies():
+            return False
+        try:
+            async with httpx.AsyncClient(cookies=load_cookies(self.auth_path), timeout=15.0) as client:
+                resp = await client.get(f"{self.base_url}/project", follow_redirects=False)
+        except httpx.HTTPError as e:
+            logger.warning("Session probe failed: %s", e)
+            return False
+        valid = resp.status_code == 200
+        if valid:
+            self.mark_validated()
+        return valid
+
+    async def ensure_valid(self):
+        """Cached check first, HTTP probe only when the cache has expired."""
+        if self.is_fresh():
+            return True
+        return await self.probe()
+
+    def start_refresher(self, refresh, interval=None):
+        """
+        Runs `await refresh()` in the background whenever the session is about to
+        expire or fails its periodic probe.
+        """
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop(refresh, interval or self.ttl))
+
+    async def stop_refresher(self):
+        if self._refresher:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    async def _refresh_loop(self, refresh, interval):
+        while True:
+            delay = interval
+            expiry = self.cookie_expiry()
+            if expiry is not None:
+                delay = min(delay, max(300, expiry - self.refresh_margin - time.time()))
+            await asyncio.sleep(delay)
+            try:
+                if self.needs_refresh() or not await self.probe():
+                    logger.info("Refreshing session in the background...")
+                    await refresh()
+            except Exception as e:
+                logger.error("Background session refresh failed: %s", e)
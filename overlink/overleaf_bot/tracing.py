@@ -0,0 +1,246 @@
+import contextvars
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from .logger import setup_logger
+
+logger = setup_logger()
+
+POLICY_RE = re.compile(r"^slow>(\d+(?:\.\d+)?)(ms|s)?$")
+# Chrome trace-event thread IDs: one track for our stages, one for the page's requests.
+STAGES_TID, NETWORK_TID = 1, 2
+
+_current = contextvars.ContextVar("overlink_trace", default=None)
+
+
+def current_trace():
+    """The JobTrace of the job running in this task, or None."""
+    return _current.get()
+
+
+@contextmanager
+def trace_span(name, **args):
+    """Records the block as a span of the current job's timeline (a no-op when not tracing)."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.time()
+    outcome = "success"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        trace.span(name, start, time.time(), STAGES_TID, outcome=outcome, **args)
+
+
+class TracePolicy:
+    """
+    Which job traces to keep: "all", "failed", or "slow>20s" (jobs slower than
+    the threshold, and failed ones).
+    """
+
+    def __init__(self, threshold=None, keep_all=False):
+        self.threshold = threshold
+        self.keep_all = keep_all
+
+    @classmethod
+    def parse(cls, spec):
+        spec = spec.strip().lower()
+        if spec == "all":
+            return cls(keep_all=True)
+        if spec == "failed":
+            return cls()
+        match = POLICY_RE.match(spec)
+        if not match:
+            raise ValueError(f"Invalid trace policy '{spec}' (use all, failed or slow>20s)")
+        value, unit = float(match.group(1)), match.group(2)
+        return cls(threshold=value / 1000 if unit == "ms" else value)
+
+    def keep(self, duration, ok):
+        return self.keep_all or not ok or (self.threshold is not None and duration > self.threshold)
+
+
+class JobTrace:
+    """
+    Everything recorded for one job: stage spans, network timings of its pages and
+    (on the browser path) Playwright traces, staged in a pending directory until
+    the tracer decides whether to keep them.
+    """
+
+    def __init__(self, tracer, label):
+        self.tracer = tracer
+        self.label = label
+        self.started = time.time()
+        self.events = []
+        self.outcome = None
+        self.error = None
+        self.playwright_traces = 0
+        self.pending_dir = os.path.join(tracer.root, ".pending", uuid.uuid4().hex)
+
+    def _us(self, t):
+        return round((t - self.started) * 1_000_000)
+
+    def span(self, name, start, end, tid, **args):
+        self.events.append({
+            "name": name, "cat": "stage" if tid == STAGES_TID else "network", "ph": "X",
+            "ts": self._us(start), "dur": max(0, round((end - start) * 1_000_000)),
+            "pid": 1, "tid": tid, "args": args
+        })
+
+    def instant(self, name, tid, **args):
+        self.events.append({"name": name, "ph": "i", "s": "t", "ts": self._us(time.time()), "pid": 1, "tid": tid,
+                            "args": args})
+
+    def record(self, result):
+        """Takes the outcome from a download result: "success", or the failure's kind and error."""
+        self.outcome = "success" if result else getattr(result, "kind", "failed")
+        self.error = getattr(result, "error", None)
+
+    def attach(self, page):
+        """Records the timing of every request the page makes."""
+        page.on("requestfinished", self._request_finished)
+        page.on("requestfailed", self._request_failed)
+
+    def detach(self, page):
+        page.remove_listener("requestfinished", self._request_finished)
+        page.remove_listener("requestfailed", self._request_failed)
+
+    def _request_finished(self, request):
+        timing = request.timing
+        start = timing.get("startTime", -1)
+        end = timing.get("responseEnd", -1)
+        if start < 0 or end < 0:
+            return
+        phase = lambda a, b: round(timing[b] - timing[a], 3) if timing.get(a, -1) >= 0 and timing.get(b, -1) >= 0 else None
+        start /= 1000
+        self.span(f"{request.method} {request.url[:160]}", start, start + end / 1000, NETWORK_TID,
+                  resource=request.resource_type, dns_ms=phase("domainLookupStart", "domainLookupEnd"),
+                  connect_ms=phase("connectStart", "connectEnd"), ttfb_ms=phase("requestStart", "responseStart"),
+                  download_ms=phase("responseStart", "responseEnd"))
+
+    def _request_failed(self, request):
+        self.instant(f"FAILED {request.method} {request.url[:160]}", NETWORK_TID,
+                     resource=request.resource_type, error=request.failure)
+
+    async def start_browser(self, context):
+        """Starts a Playwright trace of `context` (which should serve only this job)."""
+        await context.tracing.start(screenshots=True, snapshots=True)
+
+    async def stop_browser(self, context):
+        os.makedirs(self.pending_dir, exist_ok=True)
+        self.playwright_traces += 1
+        try:
+            await context.tracing.stop(path=os.path.join(self.pending_dir, f"playwright-{self.playwright_traces}.zip"))
+        except Exception as e:
+            logger.warning("Failed to save Playwright trace: %s", e)
+
+    def timeline(self, duration):
+        """The job as Chrome trace-event JSON (load it in chrome://tracing or Perfetto)."""
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"overlink {self.label}"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": STAGES_TID, "args": {"name": "stages"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": NETWORK_TID, "args": {"name": "network"}}
+        ]
+        job = {"name": self.label, "cat": "job", "ph": "X", "ts": 0, "dur": round(duration * 1_000_000),
+               "pid": 1, "tid": STAGES_TID, "args": {"outcome": self.outcome, "error": self.error}}
+        return {
+            "traceEvents": metadata + [job] + self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"project": self.label, "started_at": self.started, "duration": round(duration, 3),
+                          "outcome": self.outcome, "error": self.error}
+        }
+
+
+class Tracer:
+    """
+    Opt-in per-job tracing. Every job is recorded; when it ends, `policy` decides
+    whether its timeline.json (and Playwright traces) are kept under
+    <root>/<time>-<project>-<outcome>/ or thrown away. The kept traces are pruned
+    to the newest `max_traces`, `max_bytes` in total and `max_age_days`.
+    """
+
+    def __init__(self, root, policy, max_traces=50, max_bytes=500 * 1024 * 1024, max_age_days=7, playwright=True):
+        self.root = root
+        self.policy = TracePolicy.parse(policy) if isinstance(policy, str) else policy
+        self.max_traces = max_traces
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.playwright = playwright
+
+    @contextmanager
+    def job(self, label):
+        """
+        Traces the block as one job: `with tracer.job(pid) as trace: ...; trace.outcome = ...`
+        Set `trace.outcome` ("success" or a failure kind) and `trace.error` before leaving it.
+        """
+        trace = JobTrace(self, label)
+        token = _current.set(trace)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.outcome, trace.error = "error", trace.error or repr(e)
+            raise
+        finally:
+            _current.reset(token)
+            self.finish(trace)
+
+    def finish(self, trace):
+        duration = time.time() - trace.started
+        ok = trace.outcome == "success"
+        if not self.policy.keep(duration, ok):
+            shutil.rmtree(trace.pending_dir, ignore_errors=True)
+            return None
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(trace.started))
+        label = re.sub(r"[^\w.-]+", "_", trace.label)[:60]
+        target = os.path.join(self.root, f"{stamp}-{label}-{trace.outcome or 'unknown'}")
+        if os.path.exists(target):
+            target += f"-{uuid.uuid4().hex[:6]}"
+        os.makedirs(trace.pending_dir, exist_ok=True)
+        with open(os.path.join(trace.pending_dir, "timeline.json"), "w") as f:
+            json.dump(trace.timeline(duration), f)
+        os.replace(trace.pending_dir, target)
+        logger.info("Kept trace of %s (%.1fs, %s): %s", trace.label, duration, trace.outcome, target)
+        self.prune()
+        return target
+
+    def _kept(self):
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), size, path))
+        return sorted(entries, reverse=True)
+
+    def prune(self, now=None):
+        """Applies the retention limits, newest traces first. Returns the number removed."""
+        now = now or time.time()
+        # Pending traces of jobs that never finished (e.g. the process was killed).
+        pending_root = os.path.join(self.root, ".pending")
+        if os.path.isdir(pending_root):
+            for name in os.listdir(pending_root):
+                path = os.path.join(pending_root, name)
+                if now - os.path.getmtime(path) > 86400:
+                    shutil.rmtree(path, ignore_errors=True)
+        kept, total, removed = 0, 0, 0
+        for mtime, size, path in self._kept():
+            too_old = self.max_age_days is not None and now - mtime > self.max_age_days * 86400
+            too_many = self.max_traces is not None and kept >= self.max_traces
+            too_big = self.max_bytes is not None and total + size > self.max_bytes
+            if too_old or too_many or too_big:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+                continue
+            kept += 1
+            total += size
+        return removed
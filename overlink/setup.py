@@ -6,6 +6,11 @@ setup(
     packages=find_packages(),
     install_requires=[
         "playwright>=1.41.0",
+        "httpx",
         "python-dotenv"
-    ]
+    ],
+    extras_require={
+        # Lossless PDF linearization/recompression after download
+        "optimize": ["pikepdf"]
+    }
 )